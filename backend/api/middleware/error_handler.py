@@ -1,6 +1,6 @@
 # backend/api/middleware/error_handler.py
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
@@ -11,7 +11,7 @@ def register_exception_handlers(app: FastAPI):
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         logger.error(f"HTTP error: {exc.detail}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.status_code,
             content={"error": exc.detail},
         )
@@ -19,7 +19,7 @@ def register_exception_handlers(app: FastAPI):
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
         logger.error(f"Validation error: {str(exc)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=422,
             content={"error": "Validation Error", "details": exc.errors()},
         )
@@ -27,7 +27,7 @@ def register_exception_handlers(app: FastAPI):
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
         logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Internal Server Error", "message": str(exc)},
         )
\ No newline at end of file
@@ -0,0 +1,24 @@
+# backend/api/middleware/upload_limit_middleware.py
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+import logging
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+class UploadSizeLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, max_upload_size: int):
+        super().__init__(app)
+        self.max_upload_size = max_upload_size
+
+    async def dispatch(self, request: Request, call_next):
+        # Reject oversized bodies from the declared length, before anything is received
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_upload_size:
+            logger.warning(f"Rejected request to {request.url.path}: body of {content_length} bytes exceeds limit")
+            return ORJSONResponse(
+                status_code=413,
+                content={"error": f"Request body exceeds the maximum allowed size of {self.max_upload_size} bytes"},
+            )
+
+        return await call_next(request)
@@ -1,9 +1,11 @@
 # backend/api/routers/conversation_router.py
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import asyncio
+import orjson
 
-from core.conversation.engine import ConversationEngine
 #from ...core.memory.context_manager import ContextManager
 
 router = APIRouter()
@@ -26,12 +28,8 @@ async def process_message(
     req: Request,
 ):
     try:
-        # Get the context manager from middleware
-        context_manager = req.state.context_manager
-        
-        # Get or create a conversation engine for this session
-        
-        conversation_engine = ConversationEngine(memory_service=context_manager)
+        # Reuse the conversation engine created at startup
+        conversation_engine = req.app.state.conversation_engine
         
         # Process the message
         response_data = await conversation_engine.handle_message(
@@ -49,6 +47,35 @@ async def process_message(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
+@router.post("/stream")
+async def stream_message(
+    request: MessageRequest,
+    req: Request,
+):
+    """
+    Process a message like /message, streaming the response as server-sent events.
+    
+    Each event's data is a JSON object: a "start" event with the response type
+    and created task IDs, "token" events carrying response text, then "end".
+    """
+    conversation_engine = req.app.state.conversation_engine
+    
+    async def event_stream():
+        async for event in conversation_engine.handle_message_stream(
+            message=request.message,
+            user_id=request.user_id or "default_user",
+            session_id=request.session_id or "default_session",
+            file_context=request.file_context
+        ):
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/history/{session_id}")
 async def get_conversation_history(
     session_id: str,
@@ -56,7 +83,8 @@ async def get_conversation_history(
 ):
     try:
         context_manager = req.state.context_manager
-        history = context_manager.get_conversation_history(session_id)
+        # Session reads may hit disk or Redis; keep them off the event loop
+        history = await asyncio.to_thread(context_manager.get_conversation_history, session_id)
         return {"session_id": session_id, "history": history}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving conversation history: {str(e)}")
\ No newline at end of file
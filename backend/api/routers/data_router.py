@@ -1,40 +1,145 @@
 # backend/api/routers/data_router.py
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
 from typing import Optional, List, Dict, Any
 import pandas as pd
+import numpy as np
+import asyncio
+import copy
+import gzip
 import io
-import json
+import orjson
+from cachetools import LRUCache
 
-from core.data_processing.file_handler import FileHandler
+from core.data_processing.file_handler import FileHandler, FileTooLargeError, SUPPORTED_EXTENSIONS
 from core.data_processing.data_inspector import DataInspector
 from core.data_processing.metadata_extractor import MetadataExtractor
 
 router = APIRouter()
 
+# Content types of upload parts the client compressed; stored decompressed
+GZIP_CONTENT_TYPES = ("application/gzip", "application/x-gzip")
+
+# (metadata, data_info) by (content hash, deep_memory_usage): the same file uploaded
+# in any session is analyzed once per worker
+_analysis_cache = LRUCache(maxsize=128)
+
+# Rows of preview returned with an upload response
+UPLOAD_PREVIEW_ROWS = 10
+
+def _np_default(obj: Any) -> Any:
+    """Serialize the pandas/numpy values orjson does not handle natively."""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return obj.where(obj.notna(), None).to_dict(orient="records")
+    return str(obj)
+
+class NumpyORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that also encodes the pandas values found in inspection results.
+    
+    Returning it directly skips FastAPI's jsonable_encoder pass, so numpy
+    payloads are serialized once, straight to bytes.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            default=_np_default
+        )
+
+def _extract_metadata_sync(file_path: str, file_metadata: Dict[str, Any],
+                           deep_memory_usage: bool) -> Dict[str, Any]:
+    """Run metadata extraction; module-level so it can be sent to the process pool."""
+    return MetadataExtractor(deep_memory_usage=deep_memory_usage).extract_metadata(file_path, file_metadata)
+
+def _inspect_file_sync(file_path: str) -> Dict[str, Any]:
+    """Run file inspection; module-level so it can be sent to the process pool."""
+    return DataInspector().inspect_file(file_path)
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
     session_id: str = Form(...),
+    content_hash: Optional[str] = Form(None),
     req: Request = None,
+    deep_memory_usage: bool = False,
 ):
     try:
-        # Read file content
-        contents = await file.read()
         file_handler = FileHandler()
         
-        # Save file and get file metadata
-        file_metadata = file_handler.save_file(contents, file.filename, session_id)
+        # Fail fast on unsupported types before writing anything to storage
+        if not file_handler.is_valid_file(file.filename):
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file type. Supported types: {', '.join(SUPPORTED_EXTENSIONS)}"
+            )
+        
+        # Compressed parts are decompressed while they stream to disk
+        source = file.file
+        if file.content_type in GZIP_CONTENT_TYPES:
+            source = gzip.GzipFile(fileobj=file.file, mode="rb")
+        
+        # Stream the spooled upload to disk in a worker thread so the event loop stays free
+        try:
+            file_metadata = await asyncio.to_thread(
+                file_handler.save_file, source, file.filename, session_id
+            )
+        except (gzip.BadGzipFile, EOFError):
+            raise HTTPException(status_code=400, detail="Upload is marked as gzip but is not valid gzip data")
+        except FileTooLargeError as e:
+            # Chunked or mislabelled bodies get past the Content-Length check in the middleware
+            raise HTTPException(status_code=413, detail=str(e))
         
         # Extract file path from metadata
         file_path = file_metadata["file_path"]
         
-        # Extract metadata
-        metadata_extractor = MetadataExtractor()
-        metadata = metadata_extractor.extract_metadata(file_path, file_metadata)
+        # A client-computed SHA-256 guards against corruption in transit
+        if content_hash and content_hash.lower() != file_metadata["content_hash"]:
+            file_handler.delete_file(file_metadata["file_id"], file_metadata["extension"],
+                                     file_metadata["content_hash"])
+            raise HTTPException(status_code=400, detail="Uploaded content does not match content_hash")
         
-        # Inspect data
-        data_inspector = DataInspector()
-        data_info = data_inspector.inspect_file(file_path)
+        async def read_preview():
+            # Returned with the upload so the client needs no separate /preview call;
+            # a preview failure must not fail the upload
+            try:
+                return await asyncio.to_thread(
+                    file_handler.get_data_preview, file_path, UPLOAD_PREVIEW_ROWS
+                )
+            except Exception:
+                return None
+        
+        cache_key = (file_metadata["content_hash"], deep_memory_usage)
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            # Same content analyzed before: keep its results, with this upload's file details
+            cached_metadata, cached_data_info = copy.deepcopy(cached)
+            metadata = {**cached_metadata, **file_metadata}
+            data_info = cached_data_info
+            preview = await read_preview()
+        else:
+            # Extract metadata and inspect data concurrently in worker processes,
+            # reading the preview in a thread meanwhile
+            loop = asyncio.get_running_loop()
+            process_pool = req.app.state.process_pool
+            metadata, data_info, preview = await asyncio.gather(
+                loop.run_in_executor(
+                    process_pool, _extract_metadata_sync, file_path, file_metadata, deep_memory_usage
+                ),
+                loop.run_in_executor(process_pool, _inspect_file_sync, file_path),
+                read_preview()
+            )
+            if "metadata_extraction_error" not in metadata and "error" not in data_info:
+                _analysis_cache[cache_key] = copy.deepcopy((metadata, data_info))
         
         # Add file info to context
         context_manager = req.state.context_manager
@@ -43,7 +148,8 @@ async def upload_file(
         file_id = file_metadata.get("file_id", f"{session_id}_{file.filename}")
         
         # Use the correct method name and parameters
-        context_manager.add_file(
+        await asyncio.to_thread(
+            context_manager.add_file,
             file_id=file_id,
             metadata={
                 "filename": file.filename,
@@ -53,15 +159,18 @@ async def upload_file(
             }
         )
         
-        return {
+        return NumpyORJSONResponse({
             "message": f"File {file.filename} uploaded successfully",
             "session_id": session_id,
             "file_info": {
                 "filename": file.filename,
                 "metadata": metadata,
                 "data_info": data_info
-            }
-        }
+            },
+            "preview": preview
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
@@ -72,10 +181,10 @@ async def get_data_info(
 ):
     try:
         context_manager = req.state.context_manager
-        file_info = context_manager.get_file_context()
+        file_info = await asyncio.to_thread(context_manager.get_file_context)
         if not file_info:
             raise HTTPException(status_code=404, detail="No file data found for this session")
-        return file_info
+        return NumpyORJSONResponse(file_info)
     except HTTPException:
         raise
     except Exception as e:
@@ -89,7 +198,7 @@ async def get_data_preview(
 ):
     try:
         context_manager = req.state.context_manager
-        file_context = context_manager.get_file_context()
+        file_context = await asyncio.to_thread(context_manager.get_file_context)
         
         if not file_context:
             raise HTTPException(status_code=404, detail="No file data found for this session")
@@ -99,11 +208,21 @@ async def get_data_preview(
         file_info = file_context[file_id]['metadata']
         
         file_handler = FileHandler()
-        preview_data = file_handler.get_data_preview(file_info["file_path"], rows)
         
-        return {
+        # Unchanged file and row count: the client's copy is still current
+        etag = file_handler.preview_etag(file_info["file_path"], rows)
+        if req.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        preview_data = await asyncio.to_thread(
+            file_handler.get_data_preview, file_info["file_path"], rows
+        )
+        
+        return NumpyORJSONResponse({
             "filename": file_info["filename"],
             "preview": preview_data
-        }
+        }, headers={"ETag": etag})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving data preview: {str(e)}")
\ No newline at end of file
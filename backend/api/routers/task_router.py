@@ -2,15 +2,20 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-import uuid
 
 from core.task_queue.queue_manager import TaskQueueManager
 from core.task_queue.task_schema import Task, TaskStatus, TaskType
+from utils.id_generator import new_id
 
 router = APIRouter()
 
+def get_queue_manager(req: Request) -> TaskQueueManager:
+    """Provide the application's shared task queue"""
+    return req.app.state.queue_manager
+
 class TaskRequest(BaseModel):
     session_id: str
+    user_id: str = "default_user"
     task_type: TaskType
     description: str
     parameters: Dict[str, Any] = {}
@@ -20,26 +25,40 @@ class TaskResponse(BaseModel):
     status: TaskStatus
     message: str
 
+class TaskBatchRequest(BaseModel):
+    ids: List[str]
+
+def _task_status(task: Task) -> Dict[str, Any]:
+    """Status fields returned for a single task"""
+    return {
+        "task_id": task.id,
+        "status": task.status,
+        "description": task.description,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+        "results": task.results if task.results else None
+    }
+
 @router.post("", response_model=TaskResponse)
 async def create_task(
     task_request: TaskRequest,
-    req: Request
+    queue_manager: TaskQueueManager = Depends(get_queue_manager)
 ):
     try:
         # Create a task
-        task_id = str(uuid.uuid4())
+        task_id = new_id()
         task = Task(
-            task_id=task_id,
+            id=task_id,
+            user_id=task_request.user_id,
             session_id=task_request.session_id,
-            task_type=task_request.task_type,
+            task_type=task_request.task_type.value,
             description=task_request.description,
             parameters=task_request.parameters,
             status=TaskStatus.QUEUED
         )
         
         # Add task to queue
-        queue_manager = TaskQueueManager()
-        queue_manager.add_task(task)
+        await queue_manager.enqueue(task)
         
         return {
             "task_id": task_id,
@@ -52,43 +71,50 @@ async def create_task(
 @router.get("/{task_id}")
 async def get_task_status(
     task_id: str,
-    req: Request
+    queue_manager: TaskQueueManager = Depends(get_queue_manager)
 ):
     try:
-        queue_manager = TaskQueueManager()
-        task = queue_manager.get_task(task_id)
+        task = await queue_manager.get_task(task_id)
         
         if not task:
             raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
             
-        return {
-            "task_id": task.task_id,
-            "status": task.status,
-            "description": task.description,
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
-            "results": task.results if task.results else None
-        }
+        return _task_status(task)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving task: {str(e)}")
 
+@router.post("/batch")
+async def get_task_statuses(
+    batch_request: TaskBatchRequest,
+    queue_manager: TaskQueueManager = Depends(get_queue_manager)
+):
+    try:
+        tasks = await queue_manager.get_tasks(batch_request.ids)
+        
+        return {
+            "tasks": {task_id: _task_status(task) for task_id, task in tasks.items()},
+            "missing": [task_id for task_id in batch_request.ids if task_id not in tasks]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving tasks: {str(e)}")
+
 @router.get("")
 async def list_tasks(
     session_id: str,
-    req: Request ,
-    status: Optional[TaskStatus] = None
-    
+    status: Optional[TaskStatus] = None,
+    queue_manager: TaskQueueManager = Depends(get_queue_manager)
 ):
     try:
-        queue_manager = TaskQueueManager()
-        tasks = queue_manager.list_tasks(session_id, status)
+        tasks = await queue_manager.get_tasks_by_session(session_id)
+        if status:
+            tasks = [task for task in tasks if task.status == status]
         
         return {
             "session_id": session_id,
             "count": len(tasks),
-            "tasks": tasks
+            "tasks": [task.to_dict() for task in tasks]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing tasks: {str(e)}")
\ No newline at end of file
@@ -1,16 +1,16 @@
 # backend/core/conversation/engine.py
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator
 import logging
 from datetime import datetime
-import uuid
 
 from .message_processor import UnderstandingAgent
 from .response_generator import ResponseGenerationAgent
 from ..task_queue.task_creator import TaskCreationAgent
 from ..memory.context_manager import ContextManager  
 from ..task_queue.queue_manager import TaskQueueManager
+from utils.id_generator import new_id
 from utils.prompt_templates import PROMPT_TEMPLATES
-from utils.llm_connector import LLMProvider
+from utils.llm_connector import LLMProvider, BaseLLMProvider
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -25,10 +25,11 @@ class ConversationEngine:
         llm_provider: str = "GROQ",
         model_name: str = None,
         memory_service: Optional[ContextManager] = None,
-        task_queue: Optional[TaskQueueManager] = None
+        task_queue: Optional[TaskQueueManager] = None,
+        llm: Optional[BaseLLMProvider] = None
     ):
-        # Initialize LLM provider based on user preference
-        self.llm = LLMProvider.create(provider=llm_provider, model_name=model_name)
+        # Use the injected LLM client or initialize one based on user preference
+        self.llm = llm or LLMProvider.create(provider=llm_provider, model_name=model_name)
         
         # Initialize supporting services or use injected ones
         self.memory_service = memory_service or ContextManager()
@@ -63,104 +64,217 @@ class ConversationEngine:
         logger.info(f"Processing message for user {user_id}: {message[:50]}...")
         
         # Create a unique interaction ID for this exchange
-        interaction_id = str(uuid.uuid4())
+        interaction_id = new_id()
         
         try:
-            # Ensure the session exists in the memory service
-            if not await self.memory_service.session_exists(session_id):
-                await self.memory_service.create_session(session_id, user_id)
+            turn = await self._prepare_turn(message, user_id, session_id, file_context, interaction_id)
+            if "followup" in turn:
+                return turn["followup"]
             
-            # 1. Build context from memory
-            conversation_history = await self.memory_service.get_recent_history(
-                user_id=user_id, 
-                session_id=session_id,
-                limit=10
+            # 5. Generate response
+            response = await self.response_agent.generate(
+                intent=turn["intent"],
+                entities=turn["entities"],
+                conversation_history=turn["conversation_history"],
+                available_insights=turn["past_insights"],
+                pending_tasks=turn["pending_tasks"]
             )
             
-            past_insights = await self.memory_service.get_relevant_insights(
-                user_id=user_id, 
-                query=message
-            )
+            # 6. Update memory
+            await self._store_response(turn, user_id, session_id, message, response, interaction_id)
             
-            # 2. Analyze message for intent and entities
-            analysis_result = await self.understanding_agent.analyze(
-                message=message,
-                conversation_history=conversation_history,
-                file_context=file_context
-            )
+            return {
+                "response_type": "standard",
+                "message": response,
+                "interaction_id": interaction_id,
+                "pending_tasks": [t.id for t in turn["pending_tasks"]]
+            }
             
-            intent = analysis_result["intent"]
-            entities = analysis_result["entities"]
+        except Exception as e:
+            logger.error(f"Error processing message: {str(e)}", exc_info=True)
+            return {
+                "response_type": "error",
+                "message": "I'm sorry, I encountered an error processing your request. Please try again.",
+                "interaction_id": interaction_id
+            }
+    
+    async def handle_message_stream(
+        self, 
+        message: str, 
+        user_id: str, 
+        session_id: str,
+        file_context: Dict = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process an incoming user message like handle_message, streaming the
+        response text as it is generated.
+        
+        Yields a "start" event (response type, interaction ID and created
+        task IDs), then "token" events with pieces of the response, then a
+        final "end" event. Follow-up questions and errors arrive as a single
+        token between the start and end events.
+        
+        Args:
+            message: The user's message text
+            user_id: Unique identifier for the user
+            session_id: Current conversation session ID
+            file_context: Optional metadata about uploaded files
             
-            # 3. Determine if clarification is needed
-            if analysis_result.get("needs_clarification", False):
-                followup_question = analysis_result["followup_question"]
-                
-                # Store this interaction in memory
-                await self.memory_service.store_interaction(
-                    user_id=user_id,
-                    session_id=session_id,
-                    interaction_id=interaction_id,
-                    message=message,
-                    response=followup_question,
-                    intent=intent,
-                    entities=entities,
-                    is_followup=True
-                )
-                
-                return {
-                    "response_type": "followup",
-                    "message": followup_question,
-                    "interaction_id": interaction_id
-                }
+        Yields:
+            Event dictionaries with a "type" key
+        """
+        logger.info(f"Streaming message for user {user_id}: {message[:50]}...")
+        
+        interaction_id = new_id()
+        started = False
+        
+        try:
+            turn = await self._prepare_turn(message, user_id, session_id, file_context, interaction_id)
+            if "followup" in turn:
+                yield {"type": "start", "response_type": "followup", "interaction_id": interaction_id, "pending_tasks": []}
+                started = True
+                yield {"type": "token", "text": turn["followup"]["message"]}
+                yield {"type": "end"}
+                return
             
-            # 4. Create tasks if analysis is required
-            pending_tasks = []
-            if analysis_result.get("requires_analysis", False):
-                task = await self.task_agent.create_task(
-                    user_id=user_id,
-                    session_id=session_id,
-                    intent=intent,
-                    entities=entities,
-                    context=conversation_history,
-                    file_context=file_context
-                )
-                
-                logger.info(f"Created task {task.id} for user {user_id}")
-                pending_tasks = [task]
+            yield {
+                "type": "start",
+                "response_type": "standard",
+                "interaction_id": interaction_id,
+                "pending_tasks": [t.id for t in turn["pending_tasks"]]
+            }
+            started = True
             
-            # 5. Generate response
-            response = await self.response_agent.generate(
-                intent=intent,
-                entities=entities,
-                conversation_history=conversation_history,
-                available_insights=past_insights,
-                pending_tasks=pending_tasks
+            chunks = []
+            async for chunk in self.response_agent.generate_stream(
+                intent=turn["intent"],
+                entities=turn["entities"],
+                conversation_history=turn["conversation_history"],
+                available_insights=turn["past_insights"],
+                pending_tasks=turn["pending_tasks"]
+            ):
+                chunks.append(chunk)
+                yield {"type": "token", "text": chunk}
+            
+            await self._store_response(
+                turn, user_id, session_id, message, "".join(chunks).strip(), interaction_id
             )
+            yield {"type": "end"}
             
-            # 6. Update memory
+        except Exception as e:
+            logger.error(f"Error processing message: {str(e)}", exc_info=True)
+            if not started:
+                yield {"type": "start", "response_type": "error", "interaction_id": interaction_id, "pending_tasks": []}
+            yield {"type": "token", "text": "I'm sorry, I encountered an error processing your request. Please try again."}
+            yield {"type": "end"}
+    
+    async def _prepare_turn(
+        self,
+        message: str,
+        user_id: str,
+        session_id: str,
+        file_context: Optional[Dict],
+        interaction_id: str
+    ) -> Dict[str, Any]:
+        """
+        Run the steps shared by handle_message and handle_message_stream that
+        come before response generation.
+        
+        Returns:
+            The response under "followup" if clarification is needed; otherwise
+            the intent, entities, conversation history, past insights and
+            pending tasks the response is generated from
+        """
+        # Ensure the session exists in the memory service
+        if not await self.memory_service.session_exists(session_id):
+            await self.memory_service.create_session(session_id, user_id)
+        
+        # 1. Build context from memory
+        conversation_history = await self.memory_service.get_recent_history(
+            user_id=user_id, 
+            session_id=session_id,
+            limit=10
+        )
+        
+        past_insights = await self.memory_service.get_relevant_insights(
+            user_id=user_id, 
+            query=message
+        )
+        
+        # 2. Analyze message for intent and entities
+        analysis_result = await self.understanding_agent.analyze(
+            message=message,
+            conversation_history=conversation_history,
+            file_context=file_context
+        )
+        
+        intent = analysis_result["intent"]
+        entities = analysis_result["entities"]
+        
+        # 3. Determine if clarification is needed
+        if analysis_result.get("needs_clarification", False):
+            followup_question = analysis_result["followup_question"]
+            
+            # Store this interaction in memory
             await self.memory_service.store_interaction(
                 user_id=user_id,
                 session_id=session_id,
                 interaction_id=interaction_id,
                 message=message,
-                response=response,
+                response=followup_question,
                 intent=intent,
                 entities=entities,
-                is_followup=False
+                is_followup=True
             )
             
             return {
-                "response_type": "standard",
-                "message": response,
-                "interaction_id": interaction_id,
-                "pending_tasks": [t.id for t in pending_tasks] if pending_tasks else []
+                "followup": {
+                    "response_type": "followup",
+                    "message": followup_question,
+                    "interaction_id": interaction_id
+                }
             }
+        
+        # 4. Create tasks if analysis is required
+        pending_tasks = []
+        if analysis_result.get("requires_analysis", False):
+            task = await self.task_agent.create_task(
+                user_id=user_id,
+                session_id=session_id,
+                intent=intent,
+                entities=entities,
+                context=conversation_history,
+                file_context=file_context
+            )
             
-        except Exception as e:
-            logger.error(f"Error processing message: {str(e)}", exc_info=True)
-            return {
-                "response_type": "error",
-                "message": "I'm sorry, I encountered an error processing your request. Please try again.",
-                "interaction_id": interaction_id
-            }
\ No newline at end of file
+            logger.info(f"Created task {task.id} for user {user_id}")
+            pending_tasks = [task]
+        
+        return {
+            "intent": intent,
+            "entities": entities,
+            "conversation_history": conversation_history,
+            "past_insights": past_insights,
+            "pending_tasks": pending_tasks
+        }
+    
+    async def _store_response(
+        self,
+        turn: Dict[str, Any],
+        user_id: str,
+        session_id: str,
+        message: str,
+        response: str,
+        interaction_id: str
+    ) -> None:
+        """Record a generated (non-followup) response in memory"""
+        await self.memory_service.store_interaction(
+            user_id=user_id,
+            session_id=session_id,
+            interaction_id=interaction_id,
+            message=message,
+            response=response,
+            intent=turn["intent"],
+            entities=turn["entities"],
+            is_followup=False
+        )
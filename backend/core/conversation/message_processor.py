@@ -2,7 +2,7 @@
 from typing import Dict, List, Optional, Any
 import logging
 
-from utils.prompt_templates import PROMPT_TEMPLATES
+from utils.prompt_templates import render_understanding_agent
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +39,7 @@ class UnderstandingAgent:
         history_text = self._format_history(conversation_history)
         file_context_text = self._format_file_context(file_context)
         
-        prompt = PROMPT_TEMPLATES["understanding_agent"].format(
+        prompt = render_understanding_agent(
             message=message,
             conversation_history=history_text,
             file_context=file_context_text
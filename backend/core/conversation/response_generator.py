@@ -1,8 +1,8 @@
 # backend/core/conversation/response_generator.py
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator
 import logging
 
-from utils.prompt_templates import PROMPT_TEMPLATES
+from utils.prompt_templates import render_response_generation
 
 logger = logging.getLogger(__name__)
 
@@ -38,19 +38,8 @@ class ResponseGenerationAgent:
         Returns:
             String containing the generated response
         """
-        # Format different components for the prompt
-        history_text = self._format_history(conversation_history)
-        insights_text = self._format_insights(available_insights)
-        tasks_text = self._format_tasks(pending_tasks)
-        
-        # Create the response generation prompt
-        prompt = PROMPT_TEMPLATES["response_generation"].format(
-            intent=intent["type"],
-            entities=self._format_entities(entities),
-            conversation_history=history_text,
-            available_insights=insights_text,
-            pending_tasks=tasks_text
-        )
+        prompt = self._build_prompt(intent, entities, conversation_history,
+                                    available_insights, pending_tasks)
         
         # Generate the response with a slightly higher temperature for natural variation
         response = await self.llm.generate(prompt, temperature=0.7)
@@ -58,53 +47,103 @@ class ResponseGenerationAgent:
         logger.info(f"Generated response for intent: {intent['type']}")
         return response.strip()
     
+    async def generate_stream(
+        self,
+        intent: Dict,
+        entities: List[Dict],
+        conversation_history: List[Dict],
+        available_insights: Optional[List[Dict]] = None,
+        pending_tasks: Optional[List[Dict]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate the same response as generate(), yielding it in chunks as
+        the LLM produces them.
+        
+        Args:
+            intent: Identified intent from understanding agent
+            entities: Extracted entities from understanding agent
+            conversation_history: Previous conversation exchanges
+            available_insights: Relevant insights from past analyses
+            pending_tasks: Tasks that have been created but not completed
+            
+        Yields:
+            Successive pieces of the generated response
+        """
+        prompt = self._build_prompt(intent, entities, conversation_history,
+                                    available_insights, pending_tasks)
+        
+        started = False
+        async for chunk in self.llm.generate_stream(prompt, temperature=0.7):
+            # Match generate(), which strips leading whitespace from the response
+            if not started:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    continue
+                started = True
+            yield chunk
+        
+        logger.info(f"Streamed response for intent: {intent['type']}")
+    
+    def _build_prompt(
+        self,
+        intent: Dict,
+        entities: List[Dict],
+        conversation_history: List[Dict],
+        available_insights: Optional[List[Dict]],
+        pending_tasks: Optional[List[Dict]]
+    ) -> str:
+        """Format the context components into the response generation prompt"""
+        return render_response_generation(
+            intent=intent["type"],
+            entities=self._format_entities(entities),
+            conversation_history=self._format_history(conversation_history),
+            available_insights=self._format_insights(available_insights),
+            pending_tasks=self._format_tasks(pending_tasks)
+        )
+    
     def _format_history(self, conversation_history: List[Dict]) -> str:
         """Format conversation history for inclusion in the prompt"""
         if not conversation_history:
             return "No prior conversation."
-            
-        formatted = "Recent conversation history:\n"
-        # Only include the last few exchanges to keep prompt size reasonable
-        for i, exchange in enumerate(conversation_history[-5:]):
-            formatted += f"User: {exchange['message']}\n"
-            formatted += f"Assistant: {exchange['response']}\n\n"
         
-        return formatted
+        # Only include the last few exchanges to keep prompt size reasonable
+        return "Recent conversation history:\n" + "".join(
+            f"User: {exchange['message']}\nAssistant: {exchange['response']}\n\n"
+            for exchange in conversation_history[-5:]
+        )
     
     def _format_insights(self, insights: Optional[List[Dict]]) -> str:
         """Format available insights for inclusion in the prompt"""
         if not insights:
             return "No relevant insights available."
-            
-        formatted = "Relevant insights from past analyses:\n"
-        for i, insight in enumerate(insights):
-            formatted += f"{i+1}. {insight['summary']}\n"
+        
+        parts = ["Relevant insights from past analyses:\n"]
+        for i, insight in enumerate(insights, 1):
+            parts.append(f"{i}. {insight['summary']}\n")
             if 'details' in insight:
-                formatted += f"   Details: {insight['details']}\n"
+                parts.append(f"   Details: {insight['details']}\n")
         
-        return formatted
+        return "".join(parts)
     
     def _format_tasks(self, tasks: Optional[List[Dict]]) -> str:
         """Format pending tasks for inclusion in the prompt"""
         if not tasks:
             return "No pending analytical tasks."
-            
-        formatted = "Pending analytical tasks:\n"
-        for i, task in enumerate(tasks):
-            formatted += f"{i+1}. Task: {task.task_type}\n"
-            formatted += f"   Status: {task.status}\n"
-            if hasattr(task, 'description') and task.description:
-                formatted += f"   Description: {task.description}\n"
         
-        return formatted
+        parts = ["Pending analytical tasks:\n"]
+        for i, task in enumerate(tasks, 1):
+            parts.append(f"{i}. Task: {task.task_type}\n   Status: {task.status}\n")
+            description = getattr(task, 'description', None)
+            if description:
+                parts.append(f"   Description: {description}\n")
+        
+        return "".join(parts)
     
     def _format_entities(self, entities: List[Dict]) -> str:
         """Format extracted entities for inclusion in the prompt"""
         if not entities:
             return "No specific entities identified."
-            
-        formatted = "Identified entities:\n"
-        for entity in entities:
-            formatted += f"- {entity['type']}: {entity['value']}\n"
         
-        return formatted
\ No newline at end of file
+        return "Identified entities:\n" + "".join(
+            f"- {entity['type']}: {entity['value']}\n" for entity in entities
+        )
@@ -4,13 +4,153 @@ Performs basic inspection of data files to extract schema and structural informa
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import json
+import ijson
+import mmap
+import orjson
 import os
-from typing import Dict, List, Optional, Any
+from itertools import islice
+from typing import BinaryIO, Dict, List, Optional, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Read size used when scanning files for line counts
+LINE_COUNT_CHUNK_SIZE = 1 << 20
+
+def dataframe_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame to a list of row dicts with missing values as None.
+    
+    Goes through Arrow, which maps nulls to None in C++ instead of replacing
+    NaN cell by cell in Python.
+    
+    Args:
+        df: DataFrame to convert
+        
+    Returns:
+        List of row dictionaries
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False).to_pylist()
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Object columns mixing types cannot be converted to Arrow
+        return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+def read_csv_arrow(file_path: str, nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read a CSV with PyArrow's multi-threaded reader, stopping after nrows.
+    
+    Falls back to pandas when Arrow rejects the file, e.g. when types inferred
+    from the first block conflict with later rows.
+    
+    Args:
+        file_path: Path to the CSV file
+        nrows: Maximum number of rows to read
+        
+    Returns:
+        Parsed DataFrame
+    """
+    try:
+        reader = pa_csv.open_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+        )
+        batches = []
+        rows_read = 0
+        for batch in reader:
+            batches.append(batch)
+            rows_read += batch.num_rows
+            if nrows is not None and rows_read >= nrows:
+                break
+    except pa.ArrowInvalid as e:
+        logger.warning(f"PyArrow could not parse {file_path}, falling back to pandas: {str(e)}")
+        return pd.read_csv(file_path, nrows=nrows)
+    
+    table = pa.Table.from_batches(batches, schema=reader.schema)
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    return table.to_pandas()
+
+# Number of JSON records materialized to infer columns and types
+JSON_SAMPLE_RECORDS = 100
+
+def json_root_char(f: BinaryIO) -> bytes:
+    """
+    Return the first non-whitespace byte of a JSON document and rewind the file.
+    
+    Tells arrays of records (b'[') from objects (b'{') without parsing the document.
+    
+    Args:
+        f: JSON file opened in binary mode
+        
+    Returns:
+        The first significant byte, or b'' for an empty document
+    """
+    first_char = b''
+    while chunk := f.read(1024):
+        stripped = chunk.lstrip()
+        if stripped:
+            first_char = stripped[:1]
+            break
+    f.seek(0)
+    return first_char
+
+def count_lines(file_path: str) -> int:
+    """
+    Count lines in a file by scanning fixed-size binary chunks for newlines.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Number of lines, including a final line without a trailing newline
+    """
+    line_count = 0
+    last_chunk = b''
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(LINE_COUNT_CHUNK_SIZE), b''):
+            line_count += chunk.count(b'\n')
+            last_chunk = chunk
+    
+    if last_chunk and not last_chunk.endswith(b'\n'):
+        line_count += 1
+    return line_count
+
+def read_head_lines(file_path: str, n: int) -> List[str]:
+    """
+    Read the first n lines of a text file through a memory map.
+    
+    Newlines are located with mmap.find, so only the pages covering the
+    returned lines are touched, however large the file is.
+    
+    Args:
+        file_path: Path to the file
+        n: Maximum number of lines to return
+        
+    Returns:
+        Decoded lines without line terminators
+    """
+    if n <= 0 or os.path.getsize(file_path) == 0:
+        # Zero-length files cannot be memory-mapped
+        return []
+    
+    lines = []
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        end_of_file = len(mm)
+        while len(lines) < n and start < end_of_file:
+            end = mm.find(b'\n', start)
+            if end < 0:
+                end = end_of_file
+            lines.append(mm[start:end].decode('utf-8', 'replace').rstrip('\r'))
+            start = end + 1
+    return lines
+
 class DataInspector:
     """
     Responsible for basic inspection of data files to extract schema and structure.
@@ -19,7 +159,15 @@ class DataInspector:
     
     def __init__(self):
         """Initialize the DataInspector."""
-        pass
+        # File extension -> inspection method, each taking (file_path, sample_rows)
+        self._handlers = {
+            'csv': self._inspect_csv,
+            'xlsx': self._inspect_excel,
+            'xls': self._inspect_excel,
+            'json': self._inspect_json,
+            'parquet': self._inspect_parquet,
+            'txt': self._inspect_text
+        }
     
     def inspect_file(self, file_path: str, sample_rows: int = 5) -> Dict[str, Any]:
         """
@@ -35,7 +183,7 @@ class DataInspector:
         if not os.path.exists(file_path):
             return {"error": "File not found"}
         
-        file_extension = file_path.split(".")[-1].lower()
+        file_extension = file_path.rpartition(".")[2].lower()
         
         try:
             # Basic file info
@@ -46,74 +194,9 @@ class DataInspector:
             }
             
             # Read file based on type
-            if file_extension == 'csv':
-                df = pd.read_csv(file_path, nrows=sample_rows)
-                file_info.update(self._get_tabular_info(df, file_path, 'csv'))
-                
-            elif file_extension in ['xlsx', 'xls']:
-                # Get sheet names first
-                sheet_names = pd.ExcelFile(file_path).sheet_names
-                file_info["sheet_names"] = sheet_names
-                file_info["sheet_count"] = len(sheet_names)
-                
-                # Read first sheet for preview
-                df = pd.read_excel(file_path, sheet_name=sheet_names[0], nrows=sample_rows)
-                file_info.update(self._get_tabular_info(df, file_path, 'excel', sheet=sheet_names[0]))
-                
-            elif file_extension == 'json':
-                # Try to determine if it's records or a nested structure
-                with open(file_path, 'r') as f:
-                    try:
-                        # Just read start of file to check structure
-                        start_content = f.read(1000)
-                        first_char = start_content.strip()[0] if start_content.strip() else None
-                        
-                        if first_char == '[':  # Likely array of records
-                            df = pd.read_json(file_path)
-                            file_info.update(self._get_tabular_info(df, file_path, 'json'))
-                        else:  # Nested structure or single object
-                            json_data = json.loads(start_content + f.read())  # Read the rest
-                            file_info.update({
-                                "format": "json",
-                                "structure": "nested" if isinstance(json_data, dict) else "unknown",
-                                "top_level_keys": list(json_data.keys()) if isinstance(json_data, dict) else None
-                            })
-                    except json.JSONDecodeError:
-                        # Partial read might not be valid JSON, so retry with full file
-                        f.seek(0)
-                        try:
-                            json_data = json.load(f)
-                            file_info.update({
-                                "format": "json",
-                                "structure": "nested" if isinstance(json_data, dict) else "array",
-                                "top_level_keys": list(json_data.keys()) if isinstance(json_data, dict) else None
-                            })
-                        except json.JSONDecodeError as e:
-                            file_info.update({
-                                "format": "json",
-                                "error": f"Invalid JSON: {str(e)}"
-                            })
-                
-            elif file_extension == 'parquet':
-                df = pd.read_parquet(file_path)
-                file_info.update(self._get_tabular_info(df, file_path, 'parquet'))
-                
-            elif file_extension == 'txt':
-                # Try to detect delimiter
-                try:
-                    df = pd.read_csv(file_path, sep=None, engine='python', nrows=sample_rows)
-                    file_info.update(self._get_tabular_info(df, file_path, 'delimited text'))
-                except:
-                    # If it can't be read as delimited, treat as plain text
-                    with open(file_path, 'r') as f:
-                        sample_content = f.read(1000)
-                    
-                    file_info.update({
-                        "format": "plain text",
-                        "sample_content": sample_content[:200] + ("..." if len(sample_content) > 200 else ""),
-                        "line_count_estimate": sum(1 for _ in open(file_path, 'r', encoding='utf-8', errors='ignore'))
-                    })
-            
+            handler = self._handlers.get(file_extension)
+            if handler is not None:
+                file_info.update(handler(file_path, sample_rows))
             else:
                 file_info.update({
                     "format": "unknown",
@@ -130,8 +213,180 @@ class DataInspector:
                 "file_size_bytes": os.path.getsize(file_path)
             }
     
+    def _inspect_csv(self, file_path: str, sample_rows: int) -> Dict[str, Any]:
+        """Inspect a CSV file from its first rows."""
+        df = read_csv_arrow(file_path, sample_rows)
+        return self._get_tabular_info(df, file_path, 'csv')
+    
+    def _inspect_excel(self, file_path: str, sample_rows: int) -> Dict[str, Any]:
+        """Inspect the first sheet of an Excel workbook."""
+        if file_path.lower().endswith('.xlsx'):
+            return self._inspect_xlsx(file_path, sample_rows)
+        
+        # Open the workbook once for sheet names, preview and row count
+        with pd.ExcelFile(file_path) as excel_file:
+            sheet_names = excel_file.sheet_names
+            info = {
+                "sheet_names": sheet_names,
+                "sheet_count": len(sheet_names)
+            }
+            
+            # Read first sheet for preview
+            df = pd.read_excel(excel_file, sheet_name=sheet_names[0], nrows=sample_rows)
+            info.update(self._get_tabular_info(df, file_path, 'excel', sheet=sheet_names[0],
+                                               excel_file=excel_file))
+        return info
+    
+    def _inspect_xlsx(self, file_path: str, sample_rows: int) -> Dict[str, Any]:
+        """Inspect the first sheet of an .xlsx workbook by streaming rows in read-only mode."""
+        try:
+            import openpyxl
+        except ImportError:
+            logger.error("Failed to import openpyxl library. Please install with 'pip install openpyxl'")
+            raise
+        
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet_names = workbook.sheetnames
+            worksheet = workbook[sheet_names[0]]
+            
+            # Header plus sample rows; the rest of the sheet is never parsed here
+            rows = list(islice(worksheet.iter_rows(values_only=True), sample_rows + 1))
+            df = pd.DataFrame(rows[1:], columns=rows[0]) if rows else pd.DataFrame()
+            
+            # The sheet dimension gives the row count; stream the rows only if it is missing
+            if worksheet.max_row is not None:
+                row_count = max(worksheet.max_row - 1, 0)
+            else:
+                row_count = max(sum(1 for _ in worksheet.iter_rows(values_only=True)) - 1, 0)
+        finally:
+            workbook.close()
+        
+        info = {
+            "sheet_names": sheet_names,
+            "sheet_count": len(sheet_names)
+        }
+        info.update(self._get_tabular_info(df, file_path, 'excel', sheet=sheet_names[0],
+                                           row_count=row_count))
+        return info
+    
+    def _inspect_text(self, file_path: str, sample_rows: int) -> Dict[str, Any]:
+        """Inspect a text file as delimited data, or as plain text if that fails."""
+        # Try to detect delimiter
+        try:
+            df = pd.read_csv(file_path, sep=None, engine='python', nrows=sample_rows)
+            return self._get_tabular_info(df, file_path, 'delimited text')
+        except:
+            # If it can't be read as delimited, treat as plain text
+            with open(file_path, 'r') as f:
+                sample_content = f.read(1000)
+            
+            return {
+                "format": "plain text",
+                "sample_content": sample_content[:200] + ("..." if len(sample_content) > 200 else ""),
+                "sample_lines": read_head_lines(file_path, sample_rows),
+                "line_count_estimate": count_lines(file_path)
+            }
+    
+    def _inspect_json(self, file_path: str, sample_rows: int) -> Dict[str, Any]:
+        """
+        Inspect a JSON file by streaming it, without loading the whole document.
+        
+        Args:
+            file_path: Path to the JSON file
+            sample_rows: Number of records to sample (at least JSON_SAMPLE_RECORDS
+                         are read for type inference)
+            
+        Returns:
+            Dictionary with tabular information for arrays of records,
+            or structure information for objects
+        """
+        with open(file_path, 'rb') as f:
+            first_char = json_root_char(f)
+            
+            try:
+                if first_char == b'[':  # Array of records
+                    sample = list(islice(ijson.items(f, 'item', use_float=True),
+                                        max(sample_rows, JSON_SAMPLE_RECORDS)))
+                    
+                    # Count the remaining items from parser events without building them
+                    f.seek(0)
+                    row_count = sum(1 for prefix, event, _ in ijson.parse(f)
+                                    if prefix == 'item' and event not in ('map_key', 'end_map', 'end_array'))
+                    
+                    info = self._get_tabular_info(pd.DataFrame(sample), file_path, 'json')
+                    info["row_count"] = row_count
+                    return info
+                
+                if first_char == b'{':  # Nested structure or single object
+                    top_level_keys = [value for prefix, event, value in ijson.parse(f)
+                                      if prefix == '' and event == 'map_key']
+                    return {
+                        "format": "json",
+                        "structure": "nested",
+                        "top_level_keys": top_level_keys
+                    }
+                
+                # A bare scalar document is small; validate it in full
+                orjson.loads(f.read())
+                return {
+                    "format": "json",
+                    "structure": "unknown",
+                    "top_level_keys": None
+                }
+            except (ijson.JSONError, json.JSONDecodeError) as e:
+                return {
+                    "format": "json",
+                    "error": f"Invalid JSON: {str(e)}"
+                }
+    
+    def _inspect_parquet(self, file_path: str, sample_rows: int) -> Dict[str, Any]:
+        """
+        Inspect a Parquet file from its footer metadata and first rows only.
+        
+        Args:
+            file_path: Path to the Parquet file
+            sample_rows: Number of rows to read for the sample
+            
+        Returns:
+            Dictionary with basic tabular information
+        """
+        # No pre-buffering: only the footer and the start of the first row group are needed
+        parquet_file = pq.ParquetFile(file_path, pre_buffer=False)
+        metadata = parquet_file.metadata
+        
+        # Decode just enough of the first row group for the sample
+        first_batch = next(parquet_file.iter_batches(batch_size=sample_rows, use_threads=False), None)
+        if first_batch is not None:
+            df = first_batch.to_pandas()
+        else:
+            df = parquet_file.schema_arrow.empty_table().to_pandas()
+        
+        info = self._get_tabular_info(df, file_path, 'parquet')
+        info["row_count"] = metadata.num_rows
+        
+        # Null counts from the column chunk statistics cover the whole file
+        has_nulls = {}
+        for rg in range(metadata.num_row_groups):
+            row_group = metadata.row_group(rg)
+            for i in range(row_group.num_columns):
+                column = row_group.column(i)
+                stats = column.statistics
+                if stats is None or not stats.has_null_count:
+                    continue
+                name = column.path_in_schema
+                has_nulls[name] = has_nulls.get(name, False) or stats.null_count > 0
+        
+        for column_info in info.get("columns", []):
+            if column_info["name"] in has_nulls:
+                column_info["nullable"] = has_nulls[column_info["name"]]
+        
+        return info
+    
     def _get_tabular_info(self, df: pd.DataFrame, file_path: str, format_type: str, 
-                          sheet: Optional[str] = None) -> Dict[str, Any]:
+                          sheet: Optional[str] = None,
+                          excel_file: Optional[pd.ExcelFile] = None,
+                          row_count: Optional[int] = None) -> Dict[str, Any]:
         """
         Extract basic information from a tabular dataset.
         
@@ -140,6 +395,8 @@ class DataInspector:
             file_path: Path to the source file
             format_type: Type of the file format (csv, excel, etc.)
             sheet: Sheet name for Excel files
+            excel_file: Already opened workbook for Excel files, to avoid re-parsing it
+            row_count: Row count if already known, skipping the count below
             
         Returns:
             Dictionary with basic tabular information
@@ -151,10 +408,9 @@ class DataInspector:
                 "is_empty": True
             }
         
-        # Get column info
+        # Get column info from whole-frame passes rather than one Series per column
         columns_info = []
-        for col in df.columns:
-            dtype = str(df[col].dtype)
+        for col, dtype, has_nulls in zip(df.columns, df.dtypes.astype(str), df.isna().any()):
             # Simplify pandas dtype names for better readability
             if 'int' in dtype:
                 simple_type = 'integer'
@@ -170,26 +426,27 @@ class DataInspector:
             columns_info.append({
                 "name": str(col),
                 "type": simple_type,
-                "nullable": df[col].isna().any()
+                "nullable": has_nulls
             })
         
         # Count rows in the full file without loading it all in memory
-        row_count = None
         try:
-            if format_type == 'csv':
+            if row_count is not None:
+                pass
+            elif format_type == 'csv':
                 # Count lines and subtract header
-                row_count = sum(1 for _ in open(file_path, 'r')) - 1
+                row_count = count_lines(file_path) - 1
             elif format_type == 'excel' and sheet:
                 # This gets row count but loads the whole sheet
                 # In production, use a more efficient method for large files
-                xl = pd.ExcelFile(file_path)
+                xl = excel_file if excel_file is not None else pd.ExcelFile(file_path)
                 row_count = len(pd.read_excel(xl, sheet_name=sheet))
         except Exception as e:
             logger.warning(f"Could not count rows: {str(e)}")
             row_count = "unknown"
         
         # Sample data (first few rows)
-        sample_records = df.head(5).to_dict(orient='records')
+        sample_records = dataframe_to_records(df.head(5))
         
         return {
             "format": format_type,
@@ -198,4 +455,5 @@ class DataInspector:
             "row_count": row_count,
             "columns": columns_info,
             "sample_records": sample_records
-        }
\ No newline at end of file
+        }
+
@@ -5,13 +5,25 @@ Validates files and manages their storage without performing analytical processi
 """
 
 import os
-import uuid
+import copy
+import hashlib
+import ijson
 import pandas as pd
-from typing import Dict, List, Optional, Tuple, BinaryIO, Union
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple, BinaryIO, Union
 import logging
 from pathlib import Path
 import shutil
 import mimetypes
+import queue
+import threading
+
+from utils.id_generator import new_id
+from .data_inspector import dataframe_to_records, json_root_char, read_csv_arrow, read_head_lines
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +36,33 @@ SUPPORTED_EXTENSIONS = {
     'txt': 'text/plain'
 }
 
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the maximum allowed file size."""
+
+# Chunk size used when copying uploads to disk
+COPY_CHUNK_SIZE = 1 << 20
+
+# Serializes linking to and removing content store objects, so a new upload cannot
+# link to an object that a concurrent delete is removing
+_store_lock = threading.Lock()
+
+# Reusable copy buffers, one checked out per upload in progress
+_buffer_pool = queue.LifoQueue(maxsize=int(os.environ.get('MAX_CONCURRENT_UPLOADS', 8)))
+
+def _acquire_buffer() -> bytearray:
+    """Check out a copy buffer from the pool, allocating one if the pool is empty."""
+    try:
+        return _buffer_pool.get_nowait()
+    except queue.Empty:
+        return bytearray(COPY_CHUNK_SIZE)
+
+def _release_buffer(buffer: bytearray) -> None:
+    """Return a copy buffer to the pool, dropping it if the pool is full."""
+    try:
+        _buffer_pool.put_nowait(buffer)
+    except queue.Full:
+        pass
+
 class FileHandler:
     """
     Handles file operations for the Agentic Analytics System.
@@ -38,16 +77,19 @@ class FileHandler:
             storage_path: Directory where files will be stored
         """
         self.storage_path = storage_path
+        # File contents are stored once per distinct content hash; uploads are hard links
+        # to them, so an object whose link count drops to 1 is no longer referenced
+        self.content_store_path = os.path.join(storage_path, ".store")
         self._ensure_storage_exists()
     
     def _ensure_storage_exists(self) -> None:
         """Create storage directory if it doesn't exist."""
-        os.makedirs(self.storage_path, exist_ok=True)
+        os.makedirs(self.content_store_path, exist_ok=True)
         logger.info(f"Storage directory set to {self.storage_path}")
     
     def _generate_file_id(self) -> str:
         """Generate a unique file ID."""
-        return str(uuid.uuid4())
+        return new_id()
     
     def _get_file_path(self, file_id: str, extension: str) -> str:
         """Get the full file path for a given file ID and extension."""
@@ -63,11 +105,12 @@ class FileHandler:
         Returns:
             True if file extension is supported, False otherwise
         """
-        if not filename or '.' not in filename:
+        if not filename:
             return False
         
-        extension = filename.split(".")[-1].lower()
-        return extension in SUPPORTED_EXTENSIONS
+        # One scan from the right; no dot means no extension
+        _, dot, extension = filename.rpartition(".")
+        return bool(dot) and extension.lower() in SUPPORTED_EXTENSIONS
     
     def validate_file_size(self, file_size: int, max_size_mb: int = 50) -> bool:
         """
@@ -99,24 +142,60 @@ class FileHandler:
         if not self.is_valid_file(filename):
             raise ValueError(f"Unsupported file type. Supported types: {', '.join(SUPPORTED_EXTENSIONS.keys())}")
         
-        extension = filename.split(".")[-1].lower()
+        extension = filename.rpartition(".")[2].lower()
         
         # Generate a unique ID for the file
         file_id = self._generate_file_id()
         file_path = self._get_file_path(file_id, extension)
         
-        # Save the file
-        with open(file_path, "wb") as f:
-            if hasattr(file_content, 'read'):
-                shutil.copyfileobj(file_content, f)
+        # Write to a temporary file, hashing the content as it streams in
+        temp_path = os.path.join(self.content_store_path, f".{file_id}.tmp")
+        hasher = hashlib.sha256()
+        written = 0
+        with open(temp_path, "wb") as f:
+            # Stop copying once over the size limit; a decompressing stream could otherwise
+            # expand far beyond it
+            if hasattr(file_content, 'readinto'):
+                # Fill a pooled buffer in place instead of allocating a new chunk per read
+                buffer = _acquire_buffer()
+                view = memoryview(buffer)
+                try:
+                    while bytes_read := file_content.readinto(buffer):
+                        hasher.update(view[:bytes_read])
+                        f.write(view[:bytes_read])
+                        written += bytes_read
+                        if not self.validate_file_size(written):
+                            break
+                finally:
+                    view.release()
+                    _release_buffer(buffer)
+            elif hasattr(file_content, 'read'):
+                while chunk := file_content.read(COPY_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    written += len(chunk)
+                    if not self.validate_file_size(written):
+                        break
             else:
+                hasher.update(file_content)
                 f.write(file_content)
         
         # Get file size and validate
-        file_size = os.path.getsize(file_path)
+        file_size = os.path.getsize(temp_path)
         if not self.validate_file_size(file_size):
-            os.remove(file_path)  # Remove file if it exceeds size limit
-            raise ValueError(f"File size exceeds the maximum allowed limit")
+            os.remove(temp_path)  # Remove file if it exceeds size limit
+            raise FileTooLargeError("File size exceeds the maximum allowed limit")
+        
+        # Keep one copy per distinct content; identical uploads reuse it
+        content_hash = hasher.hexdigest()
+        stored_path = os.path.join(self.content_store_path, f"{content_hash}.{extension}")
+        with _store_lock:
+            if os.path.exists(stored_path):
+                os.remove(temp_path)
+                logger.info(f"Content of {filename} already stored, skipping write")
+            else:
+                os.replace(temp_path, stored_path)
+            self._link_file(stored_path, file_path)
         
         # Create metadata
         file_metadata = {
@@ -127,12 +206,30 @@ class FileHandler:
             "user_id": user_id,
             "upload_timestamp": pd.Timestamp.now().isoformat(),
             "file_path": file_path,
-            "size_bytes": file_size
+            "size_bytes": file_size,
+            "content_hash": content_hash
         }
         
         logger.info(f"File saved: {filename} (ID: {file_id}) for user {user_id}")
         return file_metadata
     
+    def _link_file(self, stored_path: str, file_path: str) -> None:
+        """
+        Point an upload's file path at its content-addressed copy.
+        
+        Args:
+            stored_path: Path of the file in the content store
+            file_path: Path the upload is addressed by
+        """
+        try:
+            os.link(stored_path, file_path)
+        except OSError:
+            # Hard links may be unsupported by the filesystem; fall back to an independent
+            # copy. Nothing could be deleted through that copy to free the store object,
+            # so drop the object unless other uploads link to it
+            shutil.copyfile(stored_path, file_path)
+            self._release_stored(stored_path)
+    
     def get_file(self, file_id: str, extension: Optional[str] = None) -> Tuple[str, str]:
         """
         Retrieve a file by its ID.
@@ -157,26 +254,54 @@ class FileHandler:
         
         raise FileNotFoundError(f"File with ID {file_id} not found")
     
-    def delete_file(self, file_id: str, extension: Optional[str] = None) -> bool:
+    def delete_file(self, file_id: str, extension: Optional[str] = None,
+                    content_hash: Optional[str] = None) -> bool:
         """
         Delete a file from storage.
         
         Args:
             file_id: Unique identifier for the file
             extension: File extension (optional if known)
+            content_hash: SHA-256 of the content from the file metadata (optional;
+                          the file is hashed to find its store object if missing)
             
         Returns:
             True if file was deleted, False if file was not found
         """
         try:
             file_path, ext = self.get_file(file_id, extension)
-            os.remove(file_path)
+            if content_hash is None:
+                content_hash = self._hash_file(file_path)
+            stored_path = os.path.join(self.content_store_path, f"{content_hash}.{ext}")
+            with _store_lock:
+                os.remove(file_path)
+                self._release_stored(stored_path)
             logger.info(f"Deleted file: {file_id}.{ext}")
             return True
         except FileNotFoundError:
             logger.warning(f"Attempted to delete non-existent file: {file_id}")
             return False
     
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        """SHA-256 of a file's content, as recorded in its metadata by save_file."""
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(COPY_CHUNK_SIZE):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+    
+    def _release_stored(self, stored_path: Optional[str]) -> None:
+        """Remove a content store object once no upload links to it any more."""
+        if stored_path is None:
+            return
+        try:
+            if os.stat(stored_path).st_nlink == 1:
+                os.remove(stored_path)
+                logger.info(f"Removed unreferenced stored content: {os.path.basename(stored_path)}")
+        except FileNotFoundError:
+            pass
+    
     def list_user_files(self, user_id: str) -> List[Dict]:
         """
         List all files uploaded by a specific user.
@@ -190,26 +315,111 @@ class FileHandler:
         # In a real implementation, this would query a database
         # This is a simplified version that scans the directory
         user_files = []
-        for file in os.listdir(self.storage_path):
-            file_path = os.path.join(self.storage_path, file)
-            # Simple implementation - in production, would query DB by user_id
-            if os.path.isfile(file_path):
+        with os.scandir(self.storage_path) as entries:
+            for entry in entries:
+                # Simple implementation - in production, would query DB by user_id
                 try:
-                    file_id, extension = file.rsplit(".", 1)
+                    if not entry.is_file():
+                        continue
+                    file_id, extension = entry.name.rsplit(".", 1)
+                    # One stat per file
+                    stat = entry.stat()
                     # Create minimal metadata for listing
                     file_metadata = {
                         "file_id": file_id,
-                        "filename": file,
+                        "filename": entry.name,
                         "extension": extension,
-                        "size_bytes": os.path.getsize(file_path),
-                        "last_modified": pd.Timestamp(os.path.getmtime(file_path), unit='s').isoformat()
+                        "size_bytes": stat.st_size,
+                        "last_modified": pd.Timestamp(stat.st_mtime, unit='s').isoformat()
                     }
                     user_files.append(file_metadata)
                 except Exception as e:
-                    logger.error(f"Error accessing file {file}: {str(e)}")
+                    logger.error(f"Error accessing file {entry.name}: {str(e)}")
         
         return user_files
     
+    def get_data_preview(self, file_path: str, rows: int = 10) -> List[Dict[str, Any]]:
+        """
+        Read the first rows of a data file as a list of records.
+        
+        CSV and Parquet files are read through Arrow, stopping after the first
+        batch that covers the requested rows; missing values come back as None.
+        
+        Args:
+            file_path: Path to the file
+            rows: Number of rows to return
+            
+        Returns:
+            List of row dictionaries
+        """
+        # Cached per file version: a changed mtime or size produces a new key
+        real_path = os.path.realpath(file_path)
+        stat = os.stat(real_path)
+        return copy.deepcopy(_preview_cached(real_path, stat.st_mtime_ns, stat.st_size, rows))
+    
+    def preview_etag(self, file_path: str, rows: int = 10) -> str:
+        """
+        Entity tag for a preview, from the same file version get_data_preview caches on.
+        
+        Args:
+            file_path: Path to the file
+            rows: Number of rows in the preview
+            
+        Returns:
+            Quoted ETag header value
+        """
+        real_path = os.path.realpath(file_path)
+        stat = os.stat(real_path)
+        digest = hashlib.blake2b(
+            f"{real_path}:{stat.st_mtime_ns}:{stat.st_size}:{rows}".encode(), digest_size=8
+        ).hexdigest()
+        return f'"{digest}"'
+    
+    @staticmethod
+    def _read_preview(file_path: str, rows: int) -> List[Dict[str, Any]]:
+        """Read preview rows without consulting the cache (see get_data_preview)."""
+        extension = file_path.rpartition(".")[2].lower()
+        
+        if extension == 'csv':
+            reader = pa_csv.open_csv(
+                file_path,
+                convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+            )
+            batches = []
+            rows_read = 0
+            for batch in reader:
+                batches.append(batch)
+                rows_read += batch.num_rows
+                if rows_read >= rows:
+                    break
+            return pa.Table.from_batches(batches, schema=reader.schema).slice(0, rows).to_pylist()
+        
+        elif extension == 'parquet':
+            batch = next(pq.ParquetFile(file_path).iter_batches(batch_size=rows), None)
+            return batch.to_pylist() if batch is not None else []
+        
+        elif extension == 'json':
+            with open(file_path, 'rb') as f:
+                if json_root_char(f) == b'[':
+                    return list(islice(ijson.items(f, 'item', use_float=True), rows))
+            # Objects, e.g. column-oriented {"col": [...]}, are laid out by pandas as a whole
+            df = pd.read_json(file_path).head(rows)
+        
+        elif extension in ['xlsx', 'xls']:
+            df = pd.read_excel(file_path, nrows=rows)
+        
+        elif extension == 'txt':
+            try:
+                df = pd.read_csv(file_path, sep=None, engine='python', nrows=rows)
+            except Exception:
+                # Not delimited: preview the raw lines instead
+                return [{"line": line} for line in read_head_lines(file_path, rows)]
+        
+        else:
+            raise ValueError(f"Unsupported file type: {extension}")
+        
+        return dataframe_to_records(df)
+    
     def check_file_readability(self, file_id: str, extension: Optional[str] = None) -> Dict:
         """
         Check if a file can be read as a valid data file.
@@ -227,7 +437,7 @@ class FileHandler:
             
             # Just check if pandas can read the file
             if ext == 'csv':
-                pd.read_csv(file_path, nrows=5)
+                read_csv_arrow(file_path, 5)
                 result["readable"] = True
             elif ext in ['xlsx', 'xls']:
                 pd.read_excel(file_path, nrows=5)
@@ -257,4 +467,10 @@ class FileHandler:
             return {
                 "readable": False,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+
+
+@lru_cache(maxsize=256)
+def _preview_cached(file_path: str, mtime_ns: int, size: int, rows: int) -> List[Dict[str, Any]]:
+    """Preview rows keyed on (path, mtime, size, rows)."""
+    return FileHandler._read_preview(file_path, rows)
@@ -6,14 +6,52 @@ Works with file_handler.py and data_inspector.py to build comprehensive data pro
 
 import pandas as pd
 import numpy as np
-import json
+import pyarrow.parquet as pq
+import orjson
+import ijson
 import os
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 from datetime import datetime
+from itertools import islice
+
+from .data_inspector import json_root_char, read_csv_arrow
 
 logger = logging.getLogger(__name__)
 
+
+def _read_tabular(file_path: str, file_extension: str,
+                  sheet_name: Optional[str], nrows: Optional[int]) -> pd.DataFrame:
+    """
+    Parse a tabular file with the fastest reader available for its format.
+    
+    Args:
+        file_path: Path to the file
+        file_extension: Lower-cased file extension
+        sheet_name: Excel sheet to read, if any
+        nrows: Maximum number of rows to read, where the reader supports it
+        
+    Returns:
+        Parsed DataFrame
+    """
+    if file_extension in ['xlsx', 'xls']:
+        return pd.read_excel(file_path, sheet_name=sheet_name, nrows=nrows)
+    elif file_extension == 'csv':
+        return read_csv_arrow(file_path, nrows)
+    elif file_extension == 'parquet':
+        return pq.read_table(file_path, use_threads=True).to_pandas()
+    elif file_extension == 'json':
+        with open(file_path, 'rb') as f:
+            if json_root_char(f) == b'[':
+                # Stream records so only the first nrows are ever materialized
+                records = ijson.items(f, 'item', use_float=True)
+                return pd.DataFrame(list(islice(records, nrows) if nrows is not None else records))
+        # Objects, e.g. column-oriented {"col": [...]}, are laid out by pandas as a whole
+        df = pd.read_json(file_path)
+        return df.head(nrows) if nrows is not None else df
+    raise ValueError(f"Unsupported tabular format: {file_extension}")
+
+
 class MetadataExtractor:
     """
     Extracts descriptive metadata from data files including statistics, 
@@ -23,14 +61,17 @@ class MetadataExtractor:
     before handing data off to System 2 for in-depth analytics.
     """
     
-    def __init__(self, max_sample_size: int = 10000):
+    def __init__(self, max_sample_size: int = 10000, deep_memory_usage: bool = False):
         """
         Initialize the MetadataExtractor.
         
         Args:
             max_sample_size: Maximum number of rows to sample for metadata extraction
+            deep_memory_usage: Measure the size of Python objects in object columns
+                               (slow on large text columns)
         """
         self.max_sample_size = max_sample_size
+        self.deep_memory_usage = deep_memory_usage
     
     def extract_metadata(self, file_path: str, file_info: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -56,7 +97,7 @@ class MetadataExtractor:
         metadata["extraction_timestamp"] = datetime.now().isoformat()
         
         # Process based on file format
-        file_extension = file_path.split(".")[-1].lower()
+        file_extension = file_path.rpartition(".")[2].lower()
         
         try:
             # For tabular data formats
@@ -64,18 +105,13 @@ class MetadataExtractor:
                (file_extension == 'json' and metadata.get('structure') != 'nested'):
                 
                 # Load data - for Excel, use sheet from file_info if available
+                nrows = min(self.max_sample_size, metadata.get('row_count', self.max_sample_size))
                 if file_extension in ['xlsx', 'xls'] and 'sheet_names' in metadata:
-                    sheet_name = metadata['sheet']
-                    df = pd.read_excel(file_path, sheet_name=sheet_name, 
-                                      nrows=min(self.max_sample_size, metadata.get('row_count', self.max_sample_size)))
-                elif file_extension == 'csv':
-                    df = pd.read_csv(file_path, nrows=min(self.max_sample_size, metadata.get('row_count', self.max_sample_size)))
+                    df = _read_tabular(file_path, file_extension, metadata['sheet'], nrows)
+                elif file_extension in ['csv', 'json']:
+                    df = _read_tabular(file_path, file_extension, None, nrows)
                 elif file_extension == 'parquet':
-                    df = pd.read_parquet(file_path)
-                    if len(df) > self.max_sample_size:
-                        df = df.sample(self.max_sample_size)
-                elif file_extension == 'json':
-                    df = pd.read_json(file_path)
+                    df = _read_tabular(file_path, file_extension, None, None)
                     if len(df) > self.max_sample_size:
                         df = df.sample(self.max_sample_size)
                 
@@ -117,8 +153,8 @@ class MetadataExtractor:
             
             # For JSON with nested structure
             elif file_extension == 'json' and metadata.get('structure') == 'nested':
-                with open(file_path, 'r') as f:
-                    json_data = json.load(f)
+                with open(file_path, 'rb') as f:
+                    json_data = orjson.loads(f.read())
                 
                 # Get structure metrics for nested JSON
                 metadata["json_structure"] = self._analyze_json_structure(json_data)
@@ -176,26 +212,36 @@ class MetadataExtractor:
             Dictionary of column statistics
         """
         result = {}
+        row_count = len(df)
+        
+        # Whole-frame scans computed once instead of per column
+        null_counts = df.isna().sum()
+        unique_counts = df.nunique()
+        numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        numeric_stats = df[numeric_cols].agg(['min', 'max', 'mean', 'median', 'std']) if numeric_cols else None
         
         for column in df.columns:
             col_data = df[column]
+            null_count = null_counts[column]
             col_stats = {
                 "dtype": str(col_data.dtype),
-                "count": len(col_data),
-                "null_count": col_data.isna().sum(),
-                "null_percentage": round((col_data.isna().sum() / len(col_data)) * 100, 2) if len(col_data) > 0 else 0,
-                "unique_count": col_data.nunique()
+                "count": row_count,
+                "null_count": null_count,
+                "null_percentage": round((null_count / row_count) * 100, 2) if row_count > 0 else 0,
+                "unique_count": unique_counts[column]
             }
             
             # Add type-specific statistics
             if pd.api.types.is_numeric_dtype(col_data):
                 # For numeric columns
+                has_values = null_count < row_count
+                col_numeric = numeric_stats[column]
                 col_stats.update({
-                    "min": col_data.min() if not col_data.empty and not col_data.isna().all() else None,
-                    "max": col_data.max() if not col_data.empty and not col_data.isna().all() else None,
-                    "mean": col_data.mean() if not col_data.empty and not col_data.isna().all() else None,
-                    "median": col_data.median() if not col_data.empty and not col_data.isna().all() else None,
-                    "std": col_data.std() if not col_data.empty and not col_data.isna().all() else None,
+                    "min": col_numeric['min'] if has_values else None,
+                    "max": col_numeric['max'] if has_values else None,
+                    "mean": col_numeric['mean'] if has_values else None,
+                    "median": col_numeric['median'] if has_values else None,
+                    "std": col_numeric['std'] if has_values else None,
                     "distribution": self._get_numeric_distribution(col_data)
                 })
             
@@ -207,11 +253,14 @@ class MetadataExtractor:
                     # Get value counts for top values
                     value_counts = col_data.value_counts().head(5).to_dict()
                     
+                    has_content = non_null_values.any()
+                    lengths = non_null_values.str.len() if has_content else None
+                    
                     col_stats.update({
                         "top_values": value_counts,
-                        "avg_length": non_null_values.str.len().mean() if non_null_values.any() else 0,
-                        "max_length": non_null_values.str.len().max() if non_null_values.any() else 0,
-                        "min_length": non_null_values.str.len().min() if non_null_values.any() else 0
+                        "avg_length": lengths.mean() if has_content else 0,
+                        "max_length": lengths.max() if has_content else 0,
+                        "min_length": lengths.min() if has_content else 0
                     })
                     
                     # Check if the column might contain categorical data
@@ -291,7 +340,7 @@ class MetadataExtractor:
             "missing_percentage": round((missing_cells / total_cells) * 100, 2) if total_cells > 0 else 0,
             "duplicate_rows": int(duplicate_rows),
             "duplicate_percentage": round((duplicate_rows / len(df)) * 100, 2) if len(df) > 0 else 0,
-            "memory_usage_bytes": df.memory_usage(deep=True).sum()
+            "memory_usage_bytes": df.memory_usage(deep=self.deep_memory_usage).sum()
         }
     
     def _get_data_quality_metrics(self, df: pd.DataFrame) -> Dict[str, Any]:
@@ -8,6 +8,7 @@ This module provides a unified interface for managing different memory types:
 - Persistent knowledge (long-term)
 """
 
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
@@ -17,6 +18,9 @@ from .memory_store import MemoryStore
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of messages kept per session; older messages are dropped
+MAX_STORED_MESSAGES = 200
+
 class ContextManager:
     """
     Manages the context of ongoing conversations by integrating different memory systems.
@@ -47,8 +51,8 @@ class ContextManager:
             'active_tasks': [],
             'completed_tasks': [],
             'insights': [],
-            'session_start': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
+            # The session store stamps last_activity (ISO and epoch) itself
+            'session_start': datetime.now().isoformat()
         })
     
     def add_message(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
@@ -60,26 +64,44 @@ class ContextManager:
             content: The message content
             metadata: Optional metadata about the message (e.g., intent, entities)
         """
-        message = {
+        self._append_messages([self._build_message(role, content, metadata)])
+    
+    def _build_message(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build a message record for the conversation history"""
+        return {
             'role': role,
             'content': content,
             'timestamp': datetime.now().isoformat(),
             'metadata': metadata or {}
         }
+    
+    def _append_messages(self, messages: List[Dict[str, Any]], session_id: Optional[str] = None) -> None:
+        """
+        Append messages to the conversation history with a single session update.
+        Only the most recent MAX_STORED_MESSAGES messages are kept; the LLM context
+        uses a smaller window taken from the end (see get_recent_history).
         
-        session = self.session_store.get_session(self.session_id)
-        session['messages'].append(message)
-        session['last_activity'] = datetime.now().isoformat()
-        self.session_store.update_session(self.session_id, session)
+        Args:
+            messages: Message records built by _build_message
+            session_id: Session to update; defaults to the current session
+        """
+        session_id = session_id or self.session_id
+        session = self.session_store.get_session(session_id)
+        session['messages'].extend(messages)
+        if len(session['messages']) > MAX_STORED_MESSAGES:
+            del session['messages'][:-MAX_STORED_MESSAGES]
+        self.session_store.update_session(session_id, session)
         
         # Store important insights in long-term memory if this is an assistant response
-        if role == 'assistant' and metadata and metadata.get('contains_insight', False):
-            self.memory_store.store_insight(
-                session_id=self.session_id,
-                content=content,
-                entities=metadata.get('entities', []),
-                context=self._get_recent_context(3)
-            )
+        for message in messages:
+            metadata = message['metadata']
+            if message['role'] == 'assistant' and metadata.get('contains_insight', False):
+                self.memory_store.store_insight(
+                    session_id=session_id,
+                    content=message['content'],
+                    entities=metadata.get('entities', []),
+                    context=self._get_recent_context(3)
+                )
     
     def add_file(self, file_id: str, metadata: Dict[str, Any]) -> None:
         """
@@ -201,7 +223,7 @@ class ContextManager:
     ) -> List[Dict]:
         """Get recent conversation history"""
         # Use the provided session_id instead of self.session_id
-        return self.get_conversation_history(session_id, limit)
+        return await asyncio.to_thread(self.get_conversation_history, session_id, limit)
     
     async def get_relevant_insights(self, user_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -241,28 +263,28 @@ class ContextManager:
         # Update session_id to the one provided in the parameters
         self.session_id = session_id
         
-        # Add user message
-        self.add_message(
-            role="user",
-            content=message,
-            metadata={
-                "interaction_id": interaction_id,
-                "intent": intent,
-                "entities": entities
-            }
-        )
-        
-        # Add assistant response
-        self.add_message(
-            role="assistant",
-            content=response,
-            metadata={
-                "interaction_id": interaction_id,
-                "is_followup": is_followup,
-                "contains_insight": not is_followup,  # Assume non-followups contain insights
-                "entities": entities
-            }
-        )
+        # Add the user message and assistant response in one session update
+        await asyncio.to_thread(self._append_messages, [
+            self._build_message(
+                role="user",
+                content=message,
+                metadata={
+                    "interaction_id": interaction_id,
+                    "intent": intent,
+                    "entities": entities
+                }
+            ),
+            self._build_message(
+                role="assistant",
+                content=response,
+                metadata={
+                    "interaction_id": interaction_id,
+                    "is_followup": is_followup,
+                    "contains_insight": not is_followup,  # Assume non-followups contain insights
+                    "entities": entities
+                }
+            )
+        ], session_id)
     
     def get_conversation_context(self) -> Dict[str, Any]:
         """
@@ -356,7 +378,7 @@ class ContextManager:
     async def session_exists(self, session_id: str) -> bool:
         """Check if a session exists"""
         try:
-            self.session_store.get_session(session_id)
+            await asyncio.to_thread(self.session_store.get_session, session_id)
             return True
         except KeyError:
             return False
@@ -371,8 +393,8 @@ class ContextManager:
             'active_tasks': [],
             'completed_tasks': [],
             'insights': [],
-            'session_start': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
+            # The session store stamps last_activity (ISO and epoch) itself
+            'session_start': datetime.now().isoformat()
         }
-        self.session_store.create_session(session_id, initial_data)
+        await asyncio.to_thread(self.session_store.create_session, session_id, initial_data)
         
\ No newline at end of file
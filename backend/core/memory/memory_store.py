@@ -8,7 +8,7 @@ retrieval to find relevant historical information.
 
 import logging
 import os
-import json
+import orjson
 import time
 from typing import Dict, List, Any, Optional, Tuple
 import threading
@@ -330,8 +330,8 @@ class MemoryStore:
         """Load data from a JSON file or return default if not found"""
         try:
             if os.path.exists(filepath):
-                with open(filepath, 'r') as f:
-                    return json.load(f)
+                with open(filepath, 'rb') as f:
+                    return orjson.loads(f.read())
             return default
         except Exception as e:
             logger.error(f"Error loading {filepath}: {str(e)}")
@@ -340,8 +340,8 @@ class MemoryStore:
     def _save_file(self, filepath: str, data: Any) -> None:
         """Save data to a JSON file"""
         try:
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         except Exception as e:
             logger.error(f"Error saving to {filepath}: {str(e)}")
     
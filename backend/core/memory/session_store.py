@@ -6,24 +6,60 @@ This module provides functionality to store and retrieve session information
 that persists throughout a user's interaction with the system.
 """
 
-import json
 import logging
 import os
+import time
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Threads unlinking expired session files during a cleanup sweep
+CLEANUP_WORKERS = 8
+
+# Keys fetched per MGET when scanning sessions in Redis
+REDIS_MGET_BATCH = 500
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    """Serialize session data, coercing non-string keys as json.dumps would"""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+def _touch(session: Dict[str, Any]) -> None:
+    """Record activity now, as epoch seconds for comparisons and ISO text for display"""
+    now = time.time()
+    session['last_activity_ts'] = now
+    session['last_activity'] = datetime.fromtimestamp(now).isoformat()
+
+def _last_activity_ts(session: Dict[str, Any]) -> float:
+    """Epoch seconds of a session's last activity; parses the ISO field for sessions saved without one"""
+    last_activity_ts = session.get('last_activity_ts')
+    if last_activity_ts is not None:
+        return last_activity_ts
+    return datetime.fromisoformat(session['last_activity']).timestamp()
+
 class SessionStore:
     """
     Manages session data for active users, providing methods to create,
     retrieve, update, and delete sessions.
     
-    This implementation uses in-memory storage with file backup.
-    For production, consider using Redis, MongoDB, or another appropriate database.
+    By default sessions are kept in memory with file backup; changed sessions are
+    written to disk in batches by a background thread. Only the most recently used
+    sessions (SESSION_CACHE_SIZE) stay in memory, others are reloaded from disk on
+    access. When the REDIS_URL
+    environment variable is set, sessions are stored in Redis instead so they are
+    shared between worker processes and expire through key TTLs.
+    
+    Methods are synchronous and may block on disk or network I/O; async callers
+    run them through asyncio.to_thread (see ContextManager).
     """
     
+    _REDIS_KEY_PREFIX = 'session:'
+    
     _instance = None
     _lock = threading.Lock()
     
@@ -39,18 +75,29 @@ class SessionStore:
         if self._initialized:
             return
             
-        self._sessions = {}
+        self._sessions = OrderedDict()
+        self._max_cached_sessions = int(os.environ.get('SESSION_CACHE_SIZE', 1000))
         self._session_dir = os.environ.get('SESSION_DIR', 'data/sessions')
         self._session_ttl = int(os.environ.get('SESSION_TTL_HOURS', 24))
+        self._flush_interval = float(os.environ.get('SESSION_FLUSH_INTERVAL', 0.5))
+        self._cleanup_interval = float(os.environ.get('SESSION_CLEANUP_INTERVAL', 3600))
+        self._dirty_sessions = set()
+        self._dirty_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._redis = self._connect_redis()
         
-        # Create session directory if it doesn't exist
-        os.makedirs(self._session_dir, exist_ok=True)
-        
-        # Load existing sessions from disk
-        self._load_sessions()
-        
-        # Start periodic cleanup of expired sessions
-        self._start_cleanup_thread()
+        if self._redis is None:
+            # Create session directory if it doesn't exist
+            os.makedirs(self._session_dir, exist_ok=True)
+            
+            # Load existing sessions from disk
+            self._load_sessions()
+            
+            # Start periodic cleanup of expired sessions (Redis expires keys itself)
+            self._start_cleanup_thread()
+            
+            # Start the background writer for changed sessions
+            self._start_flush_thread()
         
         self._initialized = True
     
@@ -69,9 +116,17 @@ class SessionStore:
         if 'session_start' not in initial_data:
             initial_data['session_start'] = datetime.now().isoformat()
         if 'last_activity' not in initial_data:
-            initial_data['last_activity'] = datetime.now().isoformat()
+            _touch(initial_data)
+        else:
+            initial_data['last_activity_ts'] = _last_activity_ts(initial_data)
+        
+        if self._redis is not None:
+            self._redis.set(self._redis_key(session_id), _dumps(initial_data),
+                            ex=self._session_ttl_seconds)
+            logger.info(f"Created new session: {session_id}")
+            return
         
-        self._sessions[session_id] = initial_data
+        self._cache_session(session_id, initial_data)
         self._save_session(session_id)
         logger.info(f"Created new session: {session_id}")
     
@@ -88,13 +143,29 @@ class SessionStore:
         Raises:
             KeyError: If the session doesn't exist
         """
-        if not self.session_exists(session_id):
+        if self._redis is not None:
+            # Sliding expiration: accessing a session keeps it alive. Both commands
+            # go in one pipeline, so a read costs a single round trip
+            pipeline = self._redis.pipeline(transaction=False)
+            pipeline.get(self._redis_key(session_id))
+            pipeline.expire(self._redis_key(session_id), self._session_ttl_seconds)
+            raw, _ = pipeline.execute()
+            if raw is None:
+                logger.warning(f"Attempted to access non-existent session: {session_id}")
+                raise KeyError(f"Session {session_id} not found")
+            
+            session = orjson.loads(raw)
+            _touch(session)
+            return session
+        
+        session = self._get_cached_session(session_id)
+        if session is None:
             logger.warning(f"Attempted to access non-existent session: {session_id}")
             raise KeyError(f"Session {session_id} not found")
         
         # Update last activity time
-        self._sessions[session_id]['last_activity'] = datetime.now().isoformat()
-        return self._sessions[session_id]
+        _touch(session)
+        return session
     
     def update_session(self, session_id: str, data: Dict[str, Any]) -> None:
         """
@@ -107,11 +178,19 @@ class SessionStore:
         Raises:
             KeyError: If the session doesn't exist
         """
+        if self._redis is not None:
+            # xx=True only writes if the key exists, saving a separate EXISTS round-trip
+            if not self._redis.set(self._redis_key(session_id), _dumps(data),
+                                   ex=self._session_ttl_seconds, xx=True):
+                logger.warning(f"Attempted to update non-existent session: {session_id}")
+                raise KeyError(f"Session {session_id} not found")
+            return
+        
         if not self.session_exists(session_id):
             logger.warning(f"Attempted to update non-existent session: {session_id}")
             raise KeyError(f"Session {session_id} not found")
         
-        self._sessions[session_id] = data
+        self._cache_session(session_id, data)
         self._save_session(session_id)
     
     def delete_session(self, session_id: str) -> None:
@@ -121,11 +200,17 @@ class SessionStore:
         Args:
             session_id: Unique identifier for the session
         """
+        if self._redis is not None:
+            self._redis.delete(self._redis_key(session_id))
+            return
+        
         if self.session_exists(session_id):
-            del self._sessions[session_id]
+            with self._dirty_lock:
+                self._sessions.pop(session_id, None)
+                self._dirty_sessions.discard(session_id)
             
             # Remove session file if it exists
-            session_path = os.path.join(self._session_dir, f"{session_id}.json")
+            session_path = self._session_path(session_id)
             if os.path.exists(session_path):
                 os.remove(session_path)
                 logger.info(f"Deleted session file: {session_id}")
@@ -140,7 +225,9 @@ class SessionStore:
         Returns:
             True if the session exists, False otherwise
         """
-        return session_id in self._sessions
+        if self._redis is not None:
+            return bool(self._redis.exists(self._redis_key(session_id)))
+        return session_id in self._sessions or os.path.exists(self._session_path(session_id))
     
     def get_all_sessions(self) -> List[str]:
         """
@@ -149,7 +236,12 @@ class SessionStore:
         Returns:
             List of session IDs
         """
-        return list(self._sessions.keys())
+        if self._redis is not None:
+            prefix_len = len(self._REDIS_KEY_PREFIX)
+            return [key[prefix_len:] for key in
+                    self._redis.scan_iter(match=f"{self._REDIS_KEY_PREFIX}*")]
+        # Sessions evicted from memory are still on disk
+        return list(self._sessions.keys() | self._stored_session_ids())
     
     def get_active_sessions(self, hours: int = 1) -> List[str]:
         """
@@ -161,73 +253,246 @@ class SessionStore:
         Returns:
             List of active session IDs
         """
-        active_time = datetime.now() - timedelta(hours=hours)
+        active_time = time.time() - hours * 3600
         active_sessions = []
         
-        for session_id, data in self._sessions.items():
-            last_activity = datetime.fromisoformat(data['last_activity'])
-            if last_activity >= active_time:
+        if self._redis is not None:
+            sessions = self._redis_scan_sessions()
+        else:
+            sessions = list(self._sessions.items())
+        
+        for session_id, data in sessions:
+            if _last_activity_ts(data) >= active_time:
                 active_sessions.append(session_id)
         
+        if self._redis is None:
+            # Sessions not in memory: the file was written at their last update
+            for session_id, mtime in self._stored_session_mtimes().items():
+                if session_id not in self._sessions and mtime >= active_time:
+                    active_sessions.append(session_id)
+        
         return active_sessions
     
+    def _redis_scan_sessions(self):
+        """Yield (session_id, data) for every session in Redis, fetching values in MGET batches"""
+        session_ids = self.get_all_sessions()
+        for start in range(0, len(session_ids), REDIS_MGET_BATCH):
+            batch = session_ids[start:start + REDIS_MGET_BATCH]
+            values = self._redis.mget([self._redis_key(session_id) for session_id in batch])
+            for session_id, raw in zip(batch, values):
+                # Keys can expire between the scan and the MGET
+                if raw is not None:
+                    yield session_id, orjson.loads(raw)
+    
+    def flush(self) -> None:
+        """Write all sessions with pending changes to disk"""
+        with self._dirty_lock:
+            pending, self._dirty_sessions = self._dirty_sessions, set()
+            # Snapshot under the lock so sessions evicted meanwhile are still written
+            pending = [(session_id, self._sessions.get(session_id)) for session_id in pending]
+        
+        for session_id, session in pending:
+            self._write_session(session_id, session)
+    
+    @property
+    def _session_ttl_seconds(self) -> int:
+        return self._session_ttl * 3600
+    
+    def _redis_key(self, session_id: str) -> str:
+        return f"{self._REDIS_KEY_PREFIX}{session_id}"
+    
+    def _connect_redis(self):
+        """Create a Redis client if REDIS_URL is configured, otherwise return None"""
+        redis_url = os.environ.get('REDIS_URL')
+        if not redis_url:
+            return None
+        
+        try:
+            import redis
+        except ImportError:
+            logger.error("REDIS_URL is set but the redis library is missing. Please install with 'pip install redis'")
+            raise
+        
+        client = redis.Redis.from_url(redis_url, decode_responses=True)
+        logger.info(f"Session store using Redis at {redis_url}")
+        return client
+    
     def _save_session(self, session_id: str) -> None:
-        """Save a session to disk"""
-        session_path = os.path.join(self._session_dir, f"{session_id}.json")
+        """Mark a session as changed so the background writer saves it to disk"""
+        with self._dirty_lock:
+            self._dirty_sessions.add(session_id)
+        self._flush_event.set()
+    
+    def _write_session(self, session_id: str, session: Optional[Dict[str, Any]]) -> None:
+        """Write a single session to disk"""
+        if session is None:
+            # Deleted before the writer got to it
+            return
+        
+        session_path = self._session_path(session_id)
+        try:
+            # orjson holds the GIL for the whole call, so the session cannot change mid-dump
+            content = _dumps(session)
+        except Exception as e:
+            logger.error(f"Error saving session {session_id}: {str(e)}")
+            return
+        
+        # Write a temporary file and rename it over the session file, so readers on
+        # request threads see either the old or the new content, never a partial write.
+        # The thread ID keeps concurrent writers (flush thread, eviction) apart
+        temp_path = f"{session_path}.{threading.get_ident()}.tmp"
         try:
-            with open(session_path, 'w') as f:
-                json.dump(self._sessions[session_id], f)
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, session_path)
         except Exception as e:
             logger.error(f"Error saving session {session_id}: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    
+    def _session_path(self, session_id: str) -> str:
+        return os.path.join(self._session_dir, f"{session_id}.json")
+    
+    def _stored_session_ids(self) -> set:
+        """IDs of all sessions saved on disk"""
+        return {filename[:-5] for filename in os.listdir(self._session_dir)
+                if filename.endswith('.json')}
+    
+    def _stored_session_mtimes(self) -> Dict[str, float]:
+        """Time each session saved on disk was last written, from a single directory scan"""
+        mtimes = {}
+        with os.scandir(self._session_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    try:
+                        mtimes[entry.name[:-5]] = entry.stat().st_mtime
+                    except OSError:
+                        # Deleted since the directory was read
+                        continue
+        return mtimes
+    
+    def _get_cached_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a session from memory, reloading it from disk if it was evicted"""
+        with self._dirty_lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+        
+        session = self._read_session_file(session_id)
+        if session is not None:
+            self._cache_session(session_id, session)
+        return session
+    
+    def _cache_session(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Keep a session in memory, evicting the least recently used beyond the cap"""
+        evicted = []
+        with self._dirty_lock:
+            self._sessions[session_id] = data
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self._max_cached_sessions:
+                evicted_id, evicted_data = self._sessions.popitem(last=False)
+                if evicted_id in self._dirty_sessions:
+                    self._dirty_sessions.discard(evicted_id)
+                    evicted.append((evicted_id, evicted_data))
+        
+        # Unsaved changes of evicted sessions are written now since they leave memory
+        for evicted_id, evicted_data in evicted:
+            self._write_session(evicted_id, evicted_data)
+    
+    def _read_session_file(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Read a session from disk, returning None if it is missing or unreadable"""
+        session_path = self._session_path(session_id)
+        if not os.path.exists(session_path):
+            return None
+        try:
+            with open(session_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except Exception as e:
+            logger.error(f"Error loading session {session_id}: {str(e)}")
+            return None
     
     def _load_sessions(self) -> None:
-        """Load all sessions from disk"""
+        """Load the most recently updated sessions from disk, up to the cache size"""
         try:
-            for filename in os.listdir(self._session_dir):
-                if filename.endswith('.json'):
-                    session_id = filename[:-5]  # Remove the .json extension
-                    session_path = os.path.join(self._session_dir, filename)
-                    
-                    try:
-                        with open(session_path, 'r') as f:
-                            session_data = json.load(f)
-                            self._sessions[session_id] = session_data
-                    except Exception as e:
-                        logger.error(f"Error loading session {session_id}: {str(e)}")
+            mtimes = self._stored_session_mtimes()
+            session_ids = sorted(mtimes, key=mtimes.get)
+            for session_id in session_ids[-self._max_cached_sessions:]:
+                session_data = self._read_session_file(session_id)
+                if session_data is not None:
+                    self._cache_session(session_id, session_data)
             
-            logger.info(f"Loaded {len(self._sessions)} sessions from disk")
+            logger.info(f"Loaded {len(self._sessions)} of {len(session_ids)} sessions from disk")
         except Exception as e:
             logger.error(f"Error loading sessions directory: {str(e)}")
     
     def _cleanup_expired_sessions(self) -> None:
         """Remove sessions that have been inactive beyond the TTL"""
-        expiration_time = datetime.now() - timedelta(hours=self._session_ttl)
+        expiration_time = time.time() - self._session_ttl * 3600
         expired_sessions = []
         
-        for session_id, data in self._sessions.items():
+        for session_id, data in list(self._sessions.items()):
             try:
-                last_activity = datetime.fromisoformat(data['last_activity'])
-                if last_activity < expiration_time:
+                if _last_activity_ts(data) < expiration_time:
                     expired_sessions.append(session_id)
             except (KeyError, ValueError) as e:
                 logger.error(f"Error checking session expiration for {session_id}: {str(e)}")
                 expired_sessions.append(session_id)
         
-        for session_id in expired_sessions:
-            self.delete_session(session_id)
+        # Sessions evicted from memory expire based on their file's last write
+        for session_id, mtime in self._stored_session_mtimes().items():
+            if session_id not in self._sessions and mtime < expiration_time:
+                expired_sessions.append(session_id)
+        
+        if not expired_sessions:
+            return
+        
+        # Drop them from memory under one lock, then unlink the files concurrently
+        with self._dirty_lock:
+            for session_id in expired_sessions:
+                self._sessions.pop(session_id, None)
+                self._dirty_sessions.discard(session_id)
         
-        if expired_sessions:
-            logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
+        with ThreadPoolExecutor(max_workers=CLEANUP_WORKERS) as pool:
+            removed = sum(pool.map(self._remove_session_file, expired_sessions))
+        
+        logger.info(f"Cleaned up {len(expired_sessions)} expired sessions ({removed} files removed)")
+    
+    def _remove_session_file(self, session_id: str) -> bool:
+        """Delete a session's file, returning False if it was already gone"""
+        try:
+            os.remove(self._session_path(session_id))
+            return True
+        except FileNotFoundError:
+            return False
     
     def _start_cleanup_thread(self) -> None:
         """Start a background thread for periodic session cleanup"""
         def cleanup_job():
-            self._cleanup_expired_sessions()
-            
-            # Schedule the next cleanup in 1 hour
-            threading.Timer(3600, cleanup_job).start()
+            # One long-lived daemon thread, rather than a new non-daemon Timer thread per run
+            while True:
+                try:
+                    self._cleanup_expired_sessions()
+                except Exception as e:
+                    logger.error(f"Error cleaning up expired sessions: {str(e)}")
+                time.sleep(self._cleanup_interval)
         
-        # Start the first cleanup job
         cleanup_thread = threading.Thread(target=cleanup_job)
         cleanup_thread.daemon = True
-        cleanup_thread.start()
\ No newline at end of file
+        cleanup_thread.start()
+    
+    def _start_flush_thread(self) -> None:
+        """Start a background thread that writes changed sessions to disk in batches"""
+        def flush_job():
+            while True:
+                self._flush_event.wait()
+                # Let a burst of updates accumulate so each session is written once
+                time.sleep(self._flush_interval)
+                self._flush_event.clear()
+                self.flush()
+        
+        flush_thread = threading.Thread(target=flush_job)
+        flush_thread.daemon = True
+        flush_thread.start()
\ No newline at end of file
@@ -4,12 +4,14 @@ import logging
 import asyncio
 from datetime import datetime
 import heapq
-from collections import deque
+from collections import deque, OrderedDict
 
 from .task_schema import Task, TaskStatus
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
 
 class TaskQueueManager:
     """
@@ -17,24 +19,33 @@ class TaskQueueManager:
     dependencies, and dispatching tasks to the execution system.
     """
     
-    def __init__(self, storage_connector=None, max_concurrent_tasks: int = 5):
+    def __init__(self, storage_connector=None, max_concurrent_tasks: int = 5,
+                 max_recent_terminal: int = 100):
         """
         Initialize the task queue manager.
         
         Args:
             storage_connector: Connection to persistent storage for tasks
             max_concurrent_tasks: Maximum number of tasks that can run concurrently
+            max_recent_terminal: Number of finished tasks kept in memory after they
+                have been persisted (only used when storage is available)
         """
-        self.tasks: Dict[str, Task] = {}  # All tasks (by ID)
+        self.tasks: Dict[str, Task] = {}  # Live tasks (by ID); all tasks if no storage
         self.task_queue = []  # Priority queue for pending tasks
         self.running_tasks: Dict[str, Task] = {}  # Currently running tasks
         self.completed_tasks: deque = deque(maxlen=100)  # Recently completed tasks
+        self._queued: set = set()  # IDs of tasks with QUEUED status
+        self._in_progress: set = set()  # IDs of tasks with IN_PROGRESS status
+        self._recent_terminal: OrderedDict = OrderedDict()  # Persisted finished tasks (LRU)
+        self.max_recent_terminal = max_recent_terminal
         
         self.storage = storage_connector
         self.max_concurrent_tasks = max_concurrent_tasks
         self.task_handlers: Dict[str, Callable[[Task], Awaitable[Dict[str, Any]]]] = {}
         
         self._queue_lock = asyncio.Lock()
+        self._inflight: set = set()  # asyncio tasks running handlers
+        self._work_available = asyncio.Event()  # Set when a task is queued or a slot frees up
         logger.info("Task Queue Manager initialized")
     
     async def enqueue(self, task: Task) -> str:
@@ -47,9 +58,16 @@ class TaskQueueManager:
         Returns:
             The task ID
         """
+        # Make sure finished dependencies evicted from memory are known again
+        if self.storage:
+            for dep_id in task.dependencies:
+                if self._get_task_sync(dep_id) is None:
+                    await self.get_task(dep_id)
+        
         async with self._queue_lock:
             # Store the task
             self.tasks[task.id] = task
+            self._track_status(task)
             
             # Add to priority queue if it's ready to run
             if not task.dependencies or self._all_dependencies_met(task):
@@ -77,8 +95,10 @@ class TaskQueueManager:
         """Start the background task processing loop"""
         logger.info("Starting task processing loop")
         while True:
+            # Sleep until there is something to dispatch instead of polling
+            await self._work_available.wait()
+            self._work_available.clear()
             await self._process_next_tasks()
-            await asyncio.sleep(1)  # Prevent tight loop
     
     async def get_task(self, task_id: str) -> Optional[Task]:
         """
@@ -91,19 +111,58 @@ class TaskQueueManager:
             The task if found, None otherwise
         """
         # Try in-memory first
-        if task_id in self.tasks:
-            return self.tasks[task_id]
+        task = self._get_task_sync(task_id)
+        if task is not None:
+            return task
         
         # Try from storage if available
         if self.storage:
             task_data = await self.storage.get_task(task_id)
             if task_data:
                 task = Task.from_dict(task_data)
-                self.tasks[task_id] = task
+                self._cache_task(task)
                 return task
         
         return None
     
+    async def get_tasks(self, task_ids: List[str]) -> Dict[str, Task]:
+        """
+        Get several tasks by ID in one call.
+        
+        Args:
+            task_ids: The task identifiers
+            
+        Returns:
+            Dictionary of the tasks that were found, keyed by ID
+        """
+        found: Dict[str, Task] = {}
+        missing = []
+        for task_id in dict.fromkeys(task_ids):
+            task = self._get_task_sync(task_id)
+            if task is not None:
+                found[task_id] = task
+            else:
+                missing.append(task_id)
+        
+        # Fetch everything not in memory from storage concurrently
+        if missing and self.storage:
+            stored = await asyncio.gather(*(self.storage.get_task(task_id) for task_id in missing))
+            for task_data in stored:
+                if task_data:
+                    task = Task.from_dict(task_data)
+                    self._cache_task(task)
+                    found[task.id] = task
+        
+        return found
+    
+    def _get_task_sync(self, task_id: str) -> Optional[Task]:
+        """Look up a task in memory only, without touching storage"""
+        task = self.tasks.get(task_id)
+        if task is None and task_id in self._recent_terminal:
+            self._recent_terminal.move_to_end(task_id)
+            task = self._recent_terminal[task_id]
+        return task
+    
     async def get_tasks_by_session(self, session_id: str) -> List[Task]:
         """
         Get all tasks for a specific session.
@@ -115,7 +174,10 @@ class TaskQueueManager:
             List of tasks for the session
         """
         # Filter in-memory tasks first
-        session_tasks = [task for task in self.tasks.values() if task.session_id == session_id]
+        session_tasks = [
+            task for task in (*self.tasks.values(), *self._recent_terminal.values())
+            if task.session_id == session_id
+        ]
         
         # Get from storage if available
         if self.storage:
@@ -123,8 +185,8 @@ class TaskQueueManager:
             # Add any missing tasks to our in-memory store
             for task_data in stored_tasks:
                 task = Task.from_dict(task_data)
-                if task.id not in self.tasks:
-                    self.tasks[task.id] = task
+                if self._get_task_sync(task.id) is None:
+                    self._cache_task(task)
                     session_tasks.append(task)
         
         return session_tasks
@@ -139,11 +201,9 @@ class TaskQueueManager:
         Returns:
             List of active tasks
         """
-        active_tasks = [
-            task for task in self.tasks.values() 
-            if task.status in (TaskStatus.QUEUED, TaskStatus.IN_PROGRESS)
-            and (session_id is None or task.session_id == session_id)
-        ]
+        active_tasks = [self.tasks[task_id] for task_id in self._queued | self._in_progress]
+        if session_id is not None:
+            active_tasks = [task for task in active_tasks if task.session_id == session_id]
         return active_tasks
     
     async def get_completed_tasks(self, session_id: Optional[str] = None, limit: int = 10) -> List[Task]:
@@ -164,6 +224,10 @@ class TaskQueueManager:
         if session_id:
             completed = [task for task in completed if task.session_id == session_id]
         
+        # The deque is already newest-first, so no sort or storage read is needed
+        if len(completed) >= limit:
+            return completed[:limit]
+        
         # Get from storage if available and needed
         if self.storage and len(completed) < limit:
             stored_completed = await self.storage.get_completed_tasks(
@@ -194,21 +258,26 @@ class TaskQueueManager:
         Returns:
             The updated task or None if not found
         """
-        task = await self.get_task(task_id)
+        task = self._get_task_sync(task_id)
+        if task is None and self.storage:
+            task = await self.get_task(task_id)
         if not task:
             logger.warning(f"Cannot update status for unknown task {task_id}")
             return None
             
         # Update the task
-        task.update_status(status, error)
+        now = datetime.now().isoformat()
+        task.update_status(status, error, now=now)
         
         if results and status == TaskStatus.COMPLETED:
-            task.add_results(results)
+            task.add_results(results, now=now)
+        self._track_status(task)
         
         # Update dependent tasks if this one is now complete
-        if status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+        if status in TERMINAL_STATUSES:
             if task_id in self.running_tasks:
                 del self.running_tasks[task_id]
+                self._work_available.set()
             
             self.completed_tasks.appendleft(task)
             await self._check_dependent_tasks(task_id)
@@ -216,6 +285,10 @@ class TaskQueueManager:
         # Persist changes if storage is available
         if self.storage:
             await self.storage.update_task(task.to_dict())
+            
+            # Finished tasks can be reloaded from storage, so stop tracking them as live
+            if status in TERMINAL_STATUSES:
+                self._cache_task(task)
         
         logger.info(f"Updated task {task_id} status to {status}")
         return task
@@ -266,12 +339,25 @@ class TaskQueueManager:
                 if task_id in self.tasks:
                     task = self.tasks[task_id]
                     if task.status == TaskStatus.QUEUED:
+                        # Claim the slot before releasing the lock, so a wakeup while the
+                        # task is being persisted cannot hand the same slot out again
+                        task.update_status(TaskStatus.IN_PROGRESS)
+                        self._track_status(task)
+                        self.running_tasks[task.id] = task
                         tasks_to_start.append(task)
                         available_slots -= 1
             
-        # Execute tasks outside the lock
+        # Execute tasks outside the lock, keeping a reference until they finish
         for task in tasks_to_start:
-            asyncio.create_task(self._execute_task(task))
+            inflight = asyncio.create_task(self._execute_task(task))
+            self._inflight.add(inflight)
+            inflight.add_done_callback(self._inflight.discard)
+    
+    async def shutdown(self) -> None:
+        """Wait for all in-flight task handlers to finish"""
+        if self._inflight:
+            logger.info(f"Waiting for {len(self._inflight)} running tasks to finish")
+            await asyncio.gather(*self._inflight, return_exceptions=True)
     
     async def _execute_task(self, task: Task) -> None:
         """
@@ -282,9 +368,9 @@ class TaskQueueManager:
         """
         logger.info(f"Starting execution of task {task.id} of type {task.task_type}")
         
-        # Mark as in progress and add to running tasks
-        await self.update_task_status(task.id, TaskStatus.IN_PROGRESS)
-        self.running_tasks[task.id] = task
+        # Already marked in progress and counted as running by _process_next_tasks
+        if self.storage:
+            await self.storage.update_task(task.to_dict())
         
         # Find the appropriate handler
         handler = self.task_handlers.get(task.task_type)
@@ -343,6 +429,38 @@ class TaskQueueManager:
                     self._add_to_priority_queue(task)
                     logger.info(f"Dependency met for task {task.id}, adding to queue")
     
+    def _cache_task(self, task: Task) -> None:
+        """
+        Keep a task in memory. Persisted finished tasks go to a bounded LRU
+        instead of the live task map so memory doesn't grow with server lifetime.
+        
+        Args:
+            task: Task to keep in memory
+        """
+        if self.storage and task.status in TERMINAL_STATUSES:
+            self.tasks.pop(task.id, None)
+            self._recent_terminal[task.id] = task
+            self._recent_terminal.move_to_end(task.id)
+            while len(self._recent_terminal) > self.max_recent_terminal:
+                self._recent_terminal.popitem(last=False)
+        else:
+            self.tasks[task.id] = task
+        self._track_status(task)
+    
+    def _track_status(self, task: Task) -> None:
+        """
+        Keep the queued/in-progress ID sets in sync with a task's status.
+        
+        Args:
+            task: Task whose status may have changed
+        """
+        self._queued.discard(task.id)
+        self._in_progress.discard(task.id)
+        if task.status == TaskStatus.QUEUED:
+            self._queued.add(task.id)
+        elif task.status == TaskStatus.IN_PROGRESS:
+            self._in_progress.add(task.id)
+    
     def _all_dependencies_met(self, task: Task) -> bool:
         """
         Check if all dependencies for a task have been completed.
@@ -354,7 +472,7 @@ class TaskQueueManager:
             True if all dependencies are met, False otherwise
         """
         for dep_id in task.dependencies:
-            dep_task = self.tasks.get(dep_id)
+            dep_task = self._get_task_sync(dep_id)
             if not dep_task or dep_task.status != TaskStatus.COMPLETED:
                 return False
         return True
@@ -370,6 +488,7 @@ class TaskQueueManager:
         # We also use insertion time as a secondary sort key
         entry = (-task.priority, datetime.now().timestamp(), task.id)
         heapq.heappush(self.task_queue, entry)
+        self._work_available.set()
     
     def _rebuild_priority_queue(self) -> None:
         """Rebuild the priority queue, removing cancelled or completed tasks"""
@@ -1,14 +1,30 @@
 # backend/core/task_queue/task_creator.py
 from typing import Dict, List, Optional, Any
 import logging
-import uuid
+import re
 from datetime import datetime
+from types import MappingProxyType
 
-from utils.prompt_templates import PROMPT_TEMPLATES
+from utils.id_generator import new_id
+from utils.prompt_templates import render_task_creation
 from .task_schema import Task
 
 logger = logging.getLogger(__name__)
 
+# Section headers in the LLM's task creation response
+_HEADER_RE = re.compile(r'^(TASK_TYPE|DESCRIPTION|PRIORITY|PARAMETERS):\s*(.*)$')
+
+# Fallback mapping from intent types to task types
+_INTENT_TASK_MAP = MappingProxyType({
+    "data_analysis": "general_analysis",
+    "visualization": "data_visualization",
+    "summary": "data_summary",
+    "prediction": "predictive_model",
+    "correlation": "correlation_analysis",
+    "comparison": "comparative_analysis",
+    "time_series": "time_series_analysis"
+})
+
 class TaskCreationAgent:
     """
     Agent responsible for translating user intents into structured tasks
@@ -53,7 +69,7 @@ class TaskCreationAgent:
         
         # Create a structured task object
         task = Task(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             user_id=user_id,
             session_id=session_id,
             created_at=datetime.now().isoformat(),
@@ -96,7 +112,7 @@ class TaskCreationAgent:
         entities_text = self._format_entities(entities)
         
         # Create prompt for task generation
-        prompt = PROMPT_TEMPLATES["task_creation"].format(
+        prompt = render_task_creation(
             intent=intent["type"],
             entities=entities_text,
             conversation_context=history_text,
@@ -125,36 +141,32 @@ class TaskCreationAgent:
         if not context:
             return "No prior conversation."
             
-        formatted = "Recent conversation context:\n"
-        for i, exchange in enumerate(context[-3:]):  # Last 3 exchanges
-            formatted += f"User: {exchange['message']}\n"
-            formatted += f"Assistant: {exchange['response']}\n\n"
-        
-        return formatted
+        return "Recent conversation context:\n" + "".join(
+            f"User: {exchange['message']}\nAssistant: {exchange['response']}\n\n"
+            for exchange in context[-3:]  # Last 3 exchanges
+        )
     
     def _format_file_context(self, file_context: Optional[Dict]) -> str:
         """Format file context for the task creation prompt"""
         if not file_context:
             return "No files available for analysis."
             
-        formatted = "Available data files:\n"
+        parts = ["Available data files:\n"]
         for file_name, metadata in file_context.items():
-            formatted += f"- {file_name}: {metadata['type']}, {metadata['size']} bytes\n"
+            parts.append(f"- {file_name}: {metadata['type']}, {metadata['size']} bytes\n")
             if 'schema' in metadata:
-                formatted += f"  Schema: {metadata['schema']}\n"
+                parts.append(f"  Schema: {metadata['schema']}\n")
                 
-        return formatted
+        return "".join(parts)
     
     def _format_entities(self, entities: List[Dict]) -> str:
         """Format extracted entities for the task creation prompt"""
         if not entities:
             return "No specific entities identified."
             
-        formatted = "Identified entities:\n"
-        for entity in entities:
-            formatted += f"- {entity['type']}: {entity['value']}\n"
-        
-        return formatted
+        return "Identified entities:\n" + "".join(
+            f"- {entity['type']}: {entity['value']}\n" for entity in entities
+        )
     
     def _parse_task_response(self, response: str) -> Dict[str, Any]:
         """
@@ -164,34 +176,33 @@ class TaskCreationAgent:
         In practice, you would use a more robust parsing mechanism or
         structure the prompt to ensure consistent formatting.
         """
-        # Simple parsing logic for demonstration
-        lines = response.strip().split('\n')
+        # Single pass: headers are matched anywhere, everything after
+        # PARAMETERS: is treated as "key: value" lines
         task_details = {}
-        
-        for line in lines:
-            if line.startswith("TASK_TYPE:"):
-                task_details["task_type"] = line.replace("TASK_TYPE:", "").strip()
-            elif line.startswith("DESCRIPTION:"):
-                task_details["description"] = line.replace("DESCRIPTION:", "").strip()
-            elif line.startswith("PRIORITY:"):
-                try:
-                    task_details["priority"] = int(line.replace("PRIORITY:", "").strip())
-                except ValueError:
-                    task_details["priority"] = 1
-        
-        # Extract parameters section
         parameters = {}
         param_section = False
-        for line in lines:
-            if line.startswith("PARAMETERS:"):
-                param_section = True
+        
+        for line in response.strip().split('\n'):
+            match = _HEADER_RE.match(line)
+            if match:
+                header, value = match.group(1), match.group(2).strip()
+                if header == "TASK_TYPE":
+                    task_details["task_type"] = value
+                elif header == "DESCRIPTION":
+                    task_details["description"] = value
+                elif header == "PRIORITY":
+                    try:
+                        task_details["priority"] = int(value)
+                    except ValueError:
+                        task_details["priority"] = 1
+                else:
+                    param_section = True
                 continue
+            
             if param_section and line.strip() and not line.startswith("---"):
-                parts = line.split(':')
-                if len(parts) >= 2:
-                    key = parts[0].strip()
-                    value = ':'.join(parts[1:]).strip()
-                    parameters[key] = value
+                key, sep, value = line.partition(':')
+                if sep:
+                    parameters[key.strip()] = value.strip()
         
         task_details["parameters"] = parameters
         
@@ -199,14 +210,4 @@ class TaskCreationAgent:
     
     def _map_intent_to_task_type(self, intent_type: str) -> str:
         """Map intent types to appropriate task types"""
-        intent_task_mapping = {
-            "data_analysis": "general_analysis",
-            "visualization": "data_visualization",
-            "summary": "data_summary",
-            "prediction": "predictive_model",
-            "correlation": "correlation_analysis",
-            "comparison": "comparative_analysis",
-            "time_series": "time_series_analysis"
-        }
-        
-        return intent_task_mapping.get(intent_type, "general_analysis")
\ No newline at end of file
+        return _INTENT_TASK_MAP.get(intent_type, "general_analysis")
\ No newline at end of file
@@ -2,7 +2,7 @@
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TaskStatus(str, Enum):
@@ -34,6 +34,8 @@ class Task(BaseModel):
     """
     Schema for analytics tasks to be processed by the system.
     """
+    model_config = ConfigDict(extra='forbid', validate_assignment=False)
+    
     id: str
     user_id: str
     session_id: str
@@ -63,30 +65,37 @@ class Task(BaseModel):
     # Agent assignment
     assigned_agent: Optional[str] = None
     
-    def update_status(self, new_status: TaskStatus, error_message: Optional[str] = None) -> None:
+    def update_status(self, new_status: TaskStatus, error_message: Optional[str] = None,
+                      now: Optional[str] = None) -> None:
         """Update the task status and related timestamps"""
+        now = now or datetime.now().isoformat()
         self.status = new_status
-        self.updated_at = datetime.now().isoformat()
+        self.updated_at = now
         
         if new_status == TaskStatus.IN_PROGRESS and not self.started_at:
-            self.started_at = datetime.now().isoformat()
+            self.started_at = now
         
         elif new_status == TaskStatus.COMPLETED:
-            self.completed_at = datetime.now().isoformat()
+            self.completed_at = now
         
         elif new_status == TaskStatus.FAILED and error_message:
             self.error = error_message
     
-    def add_results(self, results: Dict[str, Any]) -> None:
+    def add_results(self, results: Dict[str, Any], now: Optional[str] = None) -> None:
         """Add results to the task and mark as completed"""
         self.results = results
-        self.update_status(TaskStatus.COMPLETED)
+        self.update_status(TaskStatus.COMPLETED, now=now)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert task to dictionary for storage"""
-        return self.dict()
+        """Convert task to a JSON-compatible dictionary for storage"""
+        return self.model_dump(mode='json')
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Task':
-        """Create a Task instance from dictionary data"""
-        return cls(**data)
\ No newline at end of file
+        """
+        Create a Task instance from dictionary data.
+        
+        Data is expected to come from our own storage (i.e. produced by
+        to_dict), so validation is skipped for speed.
+        """
+        return cls.model_construct(**data)
\ No newline at end of file
@@ -1,21 +1,66 @@
 # backend/api/main.py
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, suppress
+import multiprocessing
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+import httpx
 import uvicorn
 import os
 
 from api.routers import conversation_router, data_router, task_router
-from api.middleware import error_handler, logging_middleware, session_middleware
+from api.middleware import error_handler, logging_middleware, session_middleware, upload_limit_middleware
+from core.conversation.engine import ConversationEngine
 from core.memory.context_manager import ContextManager
 from core.memory.session_store import SessionStore
 from core.task_queue.queue_manager import TaskQueueManager
+from utils.llm_connector import LLMProvider
 from utils.logger import setup_logger
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared connection pool and LLM client reused by every request
+    app.state.http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+    )
+    app.state.llm = LLMProvider.create(provider="GROQ", http_client=app.state.http_client)
+    app.state.queue_manager = queue_manager
+    # The engine and its agents hold no per-request state, so one instance serves all requests
+    app.state.conversation_engine = ConversationEngine(
+        memory_service=context_manager,
+        task_queue=queue_manager,
+        llm=app.state.llm
+    )
+    # Worker processes for CPU-bound pandas work (file inspection and profiling).
+    # Started with spawn: forking now would copy the logging, session flush and
+    # cleanup threads' locks, possibly while held, into the children
+    app.state.process_pool = ProcessPoolExecutor(
+        max_workers=int(os.environ.get("DATA_WORKERS", os.cpu_count() or 1)),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    # Dispatch queued tasks; the reference keeps the loop from being garbage collected
+    app.state.task_processing = asyncio.create_task(queue_manager.start_processing())
+    yield
+    # Stop dispatching, then let running task handlers finish while the pool and
+    # HTTP client they use are still up
+    app.state.task_processing.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.task_processing
+    await app.state.queue_manager.shutdown()
+    app.state.process_pool.shutdown(wait=True, cancel_futures=True)
+    await app.state.http_client.aclose()
+    # Persist any session changes still waiting for the background writer
+    session_store.flush()
+
 # Initialize the FastAPI app
 app = FastAPI(
     title="Data Analyst Agent API",
     description="API for the Agentic Analytics System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Set up logging
@@ -38,6 +83,10 @@ app.add_middleware(
 # Add custom middleware
 app.add_middleware(logging_middleware.LoggingMiddleware)
 app.add_middleware(session_middleware.SessionMiddleware, context_manager=context_manager)
+app.add_middleware(
+    upload_limit_middleware.UploadSizeLimitMiddleware,
+    max_upload_size=int(os.environ.get("MAX_UPLOAD_SIZE_MB", 50)) * 1024 * 1024
+)
 
 # Register error handlers
 error_handler.register_exception_handlers(app)
@@ -57,4 +106,18 @@ async def health_check():
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
+    reload = os.environ.get("RELOAD", "true").lower() in ("1", "true", "yes")
+    # Task queues and locally cached sessions live in each worker process, so more
+    # than one worker needs REDIS_URL set and session-affine routing
+    workers = int(os.environ.get("WEB_WORKERS", 1))
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        reload=reload,
+        # The reloader supports a single worker only
+        workers=None if reload else workers,
+        # uvloop and httptools when installed, asyncio and h11 otherwise
+        loop="auto",
+        http="auto"
+    )
\ No newline at end of file
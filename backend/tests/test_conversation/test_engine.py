@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import Mock
+
+pytest.importorskip("dotenv")
+
+from core.conversation.engine import ConversationEngine
+
+async def _collect(stream):
+    return [event async for event in stream]
+
+@pytest.fixture
+def engine():
+    engine = ConversationEngine(llm=Mock(), memory_service=Mock(), task_queue=Mock())
+    stored = []
+    
+    async def store_response(turn, user_id, session_id, message, response, interaction_id):
+        stored.append(response)
+    
+    engine._store_response = store_response
+    engine.stored_responses = stored
+    return engine
+
+@pytest.mark.asyncio
+async def test_stream_emits_start_tokens_end(engine):
+    """A standard turn streams start, one token per generated chunk, then end"""
+    async def prepare_turn(*args):
+        return {
+            "intent": {}, "entities": [], "conversation_history": [],
+            "past_insights": [], "pending_tasks": [Mock(id="task-1")]
+        }
+    
+    async def generate_stream(**kwargs):
+        for chunk in ["Sales ", "rose ", "5%."]:
+            yield chunk
+    
+    engine._prepare_turn = prepare_turn
+    engine.response_agent.generate_stream = generate_stream
+    
+    events = await _collect(engine.handle_message_stream("How are sales?", "user", "session"))
+    
+    assert [event["type"] for event in events] == ["start", "token", "token", "token", "end"]
+    assert events[0]["response_type"] == "standard"
+    assert events[0]["pending_tasks"] == ["task-1"]
+    assert "".join(event["text"] for event in events[1:-1]) == "Sales rose 5%."
+    # The full response is stored once the stream completes
+    assert engine.stored_responses == ["Sales rose 5%."]
+
+@pytest.mark.asyncio
+async def test_stream_followup_is_a_single_token(engine):
+    async def prepare_turn(*args):
+        return {"followup": {"message": "Which region?"}}
+    
+    engine._prepare_turn = prepare_turn
+    
+    events = await _collect(engine.handle_message_stream("Break it down", "user", "session"))
+    
+    assert [event["type"] for event in events] == ["start", "token", "end"]
+    assert events[0]["response_type"] == "followup"
+    assert events[1]["text"] == "Which region?"
+
+@pytest.mark.asyncio
+async def test_stream_error_before_start(engine):
+    """A failure before any output still yields a complete start/token/end sequence"""
+    async def prepare_turn(*args):
+        raise RuntimeError("LLM unavailable")
+    
+    engine._prepare_turn = prepare_turn
+    
+    events = await _collect(engine.handle_message_stream("Hello", "user", "session"))
+    
+    assert [event["type"] for event in events] == ["start", "token", "end"]
+    assert events[0]["response_type"] == "error"
+    assert engine.stored_responses == []
+
+@pytest.mark.asyncio
+async def test_stream_error_after_start_is_not_restarted(engine):
+    """A failure mid-stream ends the stream without a second start event"""
+    async def prepare_turn(*args):
+        return {
+            "intent": {}, "entities": [], "conversation_history": [],
+            "past_insights": [], "pending_tasks": []
+        }
+    
+    async def generate_stream(**kwargs):
+        yield "Partial "
+        raise RuntimeError("connection dropped")
+    
+    engine._prepare_turn = prepare_turn
+    engine.response_agent.generate_stream = generate_stream
+    
+    events = await _collect(engine.handle_message_stream("Hello", "user", "session"))
+    
+    assert [event["type"] for event in events] == ["start", "token", "token", "end"]
+    assert engine.stored_responses == []
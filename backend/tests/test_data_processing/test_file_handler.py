@@ -0,0 +1,74 @@
+import io
+import os
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("ijson")
+
+from core.data_processing.file_handler import FileHandler, FileTooLargeError
+
+CSV_CONTENT = b"a,b\n1,2\n3,4\n"
+
+@pytest.fixture
+def file_handler(tmp_path):
+    return FileHandler(storage_path=str(tmp_path))
+
+def _store_objects(file_handler):
+    return [name for name in os.listdir(file_handler.content_store_path) if not name.startswith(".")]
+
+def test_identical_uploads_share_one_stored_copy(file_handler):
+    """Uploading the same content twice keeps a single object in the content store"""
+    first = file_handler.save_file(io.BytesIO(CSV_CONTENT), "data.csv", "user")
+    second = file_handler.save_file(io.BytesIO(CSV_CONTENT), "copy.csv", "user")
+    
+    assert first["content_hash"] == second["content_hash"]
+    assert first["file_id"] != second["file_id"]
+    assert len(_store_objects(file_handler)) == 1
+    with open(second["file_path"], "rb") as f:
+        assert f.read() == CSV_CONTENT
+
+def test_delete_last_upload_empties_store(file_handler):
+    """Deleting an upload frees its stored content once no other upload links to it"""
+    metadata = file_handler.save_file(io.BytesIO(CSV_CONTENT), "data.csv", "user")
+    
+    assert file_handler.delete_file(metadata["file_id"], metadata["extension"])
+    assert not os.path.exists(metadata["file_path"])
+    assert _store_objects(file_handler) == []
+
+def test_delete_keeps_content_still_linked(file_handler):
+    """Stored content survives until its last upload is deleted"""
+    first = file_handler.save_file(io.BytesIO(CSV_CONTENT), "data.csv", "user")
+    second = file_handler.save_file(io.BytesIO(CSV_CONTENT), "copy.csv", "user")
+    
+    file_handler.delete_file(first["file_id"], first["extension"], first["content_hash"])
+    assert len(_store_objects(file_handler)) == 1
+    with open(second["file_path"], "rb") as f:
+        assert f.read() == CSV_CONTENT
+    
+    file_handler.delete_file(second["file_id"], second["extension"], second["content_hash"])
+    assert _store_objects(file_handler) == []
+
+def test_upload_without_hard_links_keeps_no_store_object(file_handler, monkeypatch):
+    """When linking fails the upload is a plain copy and nothing is left in the store"""
+    def link_unsupported(src, dst):
+        raise OSError("hard links not supported")
+    monkeypatch.setattr(os, "link", link_unsupported)
+    
+    metadata = file_handler.save_file(io.BytesIO(CSV_CONTENT), "data.csv", "user")
+    
+    assert _store_objects(file_handler) == []
+    with open(metadata["file_path"], "rb") as f:
+        assert f.read() == CSV_CONTENT
+    assert file_handler.delete_file(metadata["file_id"], metadata["extension"], metadata["content_hash"])
+    assert not os.path.exists(metadata["file_path"])
+
+def test_delete_missing_file(file_handler):
+    assert not file_handler.delete_file("missing", "csv")
+
+def test_oversized_upload_is_rejected_and_discarded(file_handler):
+    """Content past the size limit raises FileTooLargeError and leaves nothing stored"""
+    oversized = io.BytesIO(b"0" * (51 * 1024 * 1024))
+    with pytest.raises(FileTooLargeError):
+        file_handler.save_file(oversized, "big.csv", "user")
+    assert os.listdir(file_handler.content_store_path) == []
@@ -0,0 +1,52 @@
+import json
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("ijson")
+
+from core.data_processing.file_handler import FileHandler
+from core.data_processing.metadata_extractor import MetadataExtractor
+
+COLUMNS = {"city": ["Pune", "Delhi", "Goa"], "sales": [10, 20, 30]}
+RECORDS = [{"city": city, "sales": sales} for city, sales in zip(COLUMNS["city"], COLUMNS["sales"])]
+
+@pytest.fixture
+def write_json(tmp_path):
+    def write(name, document):
+        path = tmp_path / name
+        path.write_text(json.dumps(document, indent=2))
+        return str(path)
+    return write
+
+def _upload_metadata(file_path):
+    # What the upload route passes: file handler metadata, no inspected structure
+    return {"filename": "data.json", "file_path": file_path}
+
+@pytest.mark.parametrize("document", [COLUMNS, RECORDS], ids=["object", "array"])
+def test_json_upload_metadata(write_json, document):
+    """Column-oriented objects and arrays of records both yield column statistics"""
+    file_path = write_json("data.json", document)
+    
+    metadata = MetadataExtractor().extract_metadata(file_path, _upload_metadata(file_path))
+    
+    assert "metadata_extraction_error" not in metadata
+    assert set(metadata["column_metadata"]) == {"city", "sales"}
+    assert metadata["column_metadata"]["sales"]["count"] == 3
+    assert metadata["column_metadata"]["sales"]["max"] == 30
+
+def test_json_object_sample_limited(write_json):
+    """Object-rooted JSON is cut to the sample size like streamed arrays"""
+    file_path = write_json("data.json", COLUMNS)
+    
+    metadata = MetadataExtractor(max_sample_size=2).extract_metadata(file_path, _upload_metadata(file_path))
+    
+    assert metadata["column_metadata"]["sales"]["count"] == 2
+
+@pytest.mark.parametrize("document", [COLUMNS, RECORDS], ids=["object", "array"])
+def test_json_preview(tmp_path, write_json, document):
+    file_path = write_json("data.json", document)
+    
+    preview = FileHandler(storage_path=str(tmp_path / "uploads")).get_data_preview(file_path, 2)
+    
+    assert preview == RECORDS[:2]
@@ -0,0 +1,146 @@
+import os
+import time
+import orjson
+import pytest
+from unittest.mock import Mock, call
+
+from core.memory import session_store as session_store_module
+from core.memory.session_store import SessionStore
+
+@pytest.fixture
+def session_store(tmp_path, monkeypatch):
+    """A fresh SessionStore writing to a temporary directory, holding at most two sessions in memory"""
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("SESSION_DIR", str(tmp_path))
+    monkeypatch.setenv("SESSION_CACHE_SIZE", "2")
+    # Keep the background writer out of the way; tests flush explicitly
+    monkeypatch.setenv("SESSION_FLUSH_INTERVAL", "3600")
+    monkeypatch.setattr(SessionStore, "_instance", None)
+    return SessionStore()
+
+def _session_files(session_store):
+    return sorted(os.listdir(session_store._session_dir))
+
+def test_create_session_stamps_activity(session_store):
+    """New sessions carry both the ISO and the epoch activity time"""
+    session_store.create_session("s1", {"user_id": "user"})
+    
+    session = session_store.get_session("s1")
+    assert session["user_id"] == "user"
+    assert isinstance(session["last_activity_ts"], float)
+    assert "last_activity" in session
+
+def test_flush_writes_sessions_atomically(session_store):
+    """Flushing writes one file per session and leaves no temporary files behind"""
+    session_store.create_session("s1")
+    session_store.create_session("s2")
+    session_store.flush()
+    
+    assert _session_files(session_store) == ["s1.json", "s2.json"]
+
+def test_evicted_session_is_reloaded_from_disk(session_store):
+    """Sessions beyond the cache size leave memory with their changes saved and come back on access"""
+    session_store.create_session("s1", {"user_id": "first"})
+    session_store.create_session("s2")
+    session_store.create_session("s3")
+    
+    assert "s1" not in session_store._sessions
+    assert session_store.session_exists("s1")
+    assert sorted(session_store.get_all_sessions()) == ["s1", "s2", "s3"]
+    
+    session = session_store.get_session("s1")
+    assert session["user_id"] == "first"
+    assert "s1" in session_store._sessions
+    assert len(session_store._sessions) == 2
+
+def test_update_of_evicted_session(session_store):
+    """An evicted session can be updated and the new data is what is reloaded"""
+    session_store.create_session("s1")
+    session_store.create_session("s2")
+    session_store.create_session("s3")
+    
+    session_store.update_session("s1", {"user_id": "updated"})
+    session_store.create_session("s4")
+    session_store.create_session("s5")
+    
+    assert "s1" not in session_store._sessions
+    assert session_store.get_session("s1")["user_id"] == "updated"
+
+def test_sessions_are_loaded_on_startup(session_store, monkeypatch):
+    """A new store picks up the sessions written by a previous one"""
+    session_store.create_session("s1", {"user_id": "user"})
+    session_store.flush()
+    
+    monkeypatch.setattr(SessionStore, "_instance", None)
+    reloaded = SessionStore()
+    
+    assert reloaded is not session_store
+    assert reloaded.get_session("s1")["user_id"] == "user"
+    assert reloaded.get_active_sessions() == ["s1"]
+
+def test_delete_session_removes_file(session_store):
+    """Deleting a session drops it from memory and disk"""
+    session_store.create_session("s1")
+    session_store.flush()
+    
+    session_store.delete_session("s1")
+    
+    assert not session_store.session_exists("s1")
+    assert _session_files(session_store) == []
+    with pytest.raises(KeyError):
+        session_store.get_session("s1")
+
+@pytest.fixture
+def redis_session_store(monkeypatch):
+    """A SessionStore in Redis mode backed by a mock client"""
+    client = Mock()
+    monkeypatch.setattr(SessionStore, "_instance", None)
+    monkeypatch.setattr(SessionStore, "_connect_redis", lambda self: client)
+    return SessionStore()
+
+def test_redis_get_session_reads_and_extends_ttl_in_one_pipeline(redis_session_store):
+    """A read issues GET and EXPIRE together in a non-transactional pipeline"""
+    client = redis_session_store._redis
+    pipeline = client.pipeline.return_value
+    pipeline.execute.return_value = [orjson.dumps({"user_id": "user", "last_activity": "2024-01-01T00:00:00"}), True]
+    
+    session = redis_session_store.get_session("s1")
+    
+    client.pipeline.assert_called_once_with(transaction=False)
+    pipeline.get.assert_called_once_with("session:s1")
+    pipeline.expire.assert_called_once_with("session:s1", redis_session_store._session_ttl_seconds)
+    assert session["user_id"] == "user"
+    assert isinstance(session["last_activity_ts"], float)
+
+def test_redis_get_missing_session(redis_session_store):
+    """A missing key raises KeyError like the file-backed store"""
+    redis_session_store._redis.pipeline.return_value.execute.return_value = [None, False]
+    
+    with pytest.raises(KeyError):
+        redis_session_store.get_session("missing")
+
+def test_redis_active_sessions_fetched_with_mget(redis_session_store, monkeypatch):
+    """Active sessions are read in MGET batches, skipping keys that expired after the scan"""
+    monkeypatch.setattr(session_store_module, "REDIS_MGET_BATCH", 2)
+    client = redis_session_store._redis
+    client.scan_iter.return_value = ["session:s1", "session:s2", "session:s3"]
+    now = time.time()
+    client.mget.side_effect = [
+        [orjson.dumps({"last_activity_ts": now}), orjson.dumps({"last_activity_ts": now - 7200})],
+        [None],
+    ]
+    
+    assert redis_session_store.get_active_sessions(hours=1) == ["s1"]
+    assert client.mget.call_args_list == [
+        call(["session:s1", "session:s2"]),
+        call(["session:s3"]),
+    ]
+    client.get.assert_not_called()
+
+def test_redis_update_missing_session(redis_session_store):
+    """Updates only write existing keys"""
+    redis_session_store._redis.set.return_value = None
+    
+    with pytest.raises(KeyError):
+        redis_session_store.update_session("missing", {})
+    assert redis_session_store._redis.set.call_args.kwargs["xx"] is True
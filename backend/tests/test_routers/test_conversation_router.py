@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routers import conversation_router
+
+class StreamingEngine:
+    """Stands in for ConversationEngine, yielding a fixed event sequence"""
+    
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+    
+    async def handle_message_stream(self, **kwargs):
+        self.calls.append(kwargs)
+        for event in self.events:
+            yield event
+
+EVENTS = [
+    {"type": "start", "response_type": "standard", "interaction_id": "abc", "pending_tasks": []},
+    {"type": "token", "text": "Hello "},
+    {"type": "token", "text": "there"},
+    {"type": "end"}
+]
+
+@pytest.fixture
+def engine():
+    return StreamingEngine(EVENTS)
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.include_router(conversation_router.router, prefix="/api/conversation")
+    app.state.conversation_engine = engine
+    return TestClient(app)
+
+def _parse_events(body: bytes):
+    """Split a server-sent event stream into its JSON payloads"""
+    return [orjson.loads(block[len(b"data: "):]) for block in body.split(b"\n\n") if block]
+
+def test_stream_sends_engine_events_as_sse(client, engine):
+    response = client.post("/api/conversation/stream", json={
+        "message": "Hi",
+        "session_id": "session",
+        "user_id": "user"
+    })
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert _parse_events(response.content) == EVENTS
+    assert engine.calls[0]["session_id"] == "session"
+
+def test_stream_defaults_session_and_user(client, engine):
+    client.post("/api/conversation/stream", json={"message": "Hi"})
+    
+    assert engine.calls[0]["session_id"] == "default_session"
+    assert engine.calls[0]["user_id"] == "default_user"
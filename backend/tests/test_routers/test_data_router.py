@@ -0,0 +1,81 @@
+import os
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("ijson")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routers import data_router
+
+class FileContextManager:
+    """Stands in for the session's ContextManager with a single uploaded file"""
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+    
+    def get_file_context(self):
+        return {"file-1": {"metadata": {"filename": "data.csv", "file_path": self.file_path}}}
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n3,4\n")
+    return str(path)
+
+@pytest.fixture
+def client(tmp_path, csv_path, monkeypatch):
+    # FileHandler creates its default upload directory relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    app = FastAPI()
+    app.include_router(data_router.router, prefix="/api/data")
+    
+    @app.middleware("http")
+    async def attach_context_manager(request, call_next):
+        request.state.context_manager = FileContextManager(csv_path)
+        return await call_next(request)
+    
+    with TestClient(app) as test_client:
+        yield test_client
+
+def test_preview_returns_etag(client):
+    response = client.get("/api/data/preview/session")
+    
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    body = response.json()
+    assert body["filename"] == "data.csv"
+    assert body["preview"]
+
+def test_preview_not_modified_for_matching_etag(client):
+    etag = client.get("/api/data/preview/session").headers["etag"]
+    
+    response = client.get("/api/data/preview/session", headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+def test_preview_etag_depends_on_rows(client):
+    etag = client.get("/api/data/preview/session?rows=10").headers["etag"]
+    
+    response = client.get("/api/data/preview/session?rows=1", headers={"If-None-Match": etag})
+    
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_preview_etag_changes_with_file(client, csv_path):
+    etag = client.get("/api/data/preview/session").headers["etag"]
+    with open(csv_path, "a") as f:
+        f.write("5,6\n")
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    response = client.get("/api/data/preview/session", headers={"If-None-Match": etag})
+    
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routers import task_router
+from core.task_queue.queue_manager import TaskQueueManager
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/api/task")
+    app.state.queue_manager = TaskQueueManager()
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _create_task(client, description):
+    response = client.post("/api/task", json={
+        "session_id": "session",
+        "task_type": "data_summary",
+        "description": description
+    })
+    assert response.status_code == 200
+    return response.json()["task_id"]
+
+def test_batch_returns_known_tasks_and_missing_ids(client):
+    """One batch call returns the status of every known task and lists unknown IDs"""
+    first = _create_task(client, "first")
+    second = _create_task(client, "second")
+    
+    response = client.post("/api/task/batch", json={"ids": [first, "missing-id", second]})
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["tasks"]) == {first, second}
+    assert body["tasks"][first]["description"] == "first"
+    assert body["tasks"][second]["status"] == "QUEUED"
+    assert body["missing"] == ["missing-id"]
+
+def test_batch_with_no_ids(client):
+    response = client.post("/api/task/batch", json={"ids": []})
+    
+    assert response.status_code == 200
+    assert response.json() == {"tasks": {}, "missing": []}
@@ -0,0 +1,101 @@
+import asyncio
+import contextlib
+import pytest
+
+pytest.importorskip("pydantic")
+
+from core.task_queue.queue_manager import TaskQueueManager
+from core.task_queue.task_schema import Task, TaskStatus
+
+def _task(task_id, task_type="analysis"):
+    return Task(id=task_id, user_id="user", session_id="session", task_type=task_type)
+
+class SlowStorage:
+    """Task storage whose status updates yield to the event loop for a while"""
+    
+    async def save_task(self, task_data):
+        pass
+    
+    async def update_task(self, task_data):
+        await asyncio.sleep(0.02)
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_holds_while_status_updates_are_slow():
+    """Tasks enqueued while others are still being marked in progress wait for a free slot"""
+    queue_manager = TaskQueueManager(storage_connector=SlowStorage(), max_concurrent_tasks=2)
+    running = 0
+    peak = 0
+    
+    async def handler(task):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return {"done": task.id}
+    
+    queue_manager.register_handler("analysis", handler)
+    processing = asyncio.create_task(queue_manager.start_processing())
+    try:
+        for i in range(6):
+            await queue_manager.enqueue(_task(f"task-{i}"))
+            # Let the loop dispatch while earlier tasks are mid status update
+            await asyncio.sleep(0.005)
+        
+        async def all_completed():
+            while len(queue_manager.completed_tasks) < 6:
+                await asyncio.sleep(0.01)
+        
+        await asyncio.wait_for(all_completed(), timeout=5)
+    finally:
+        processing.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await processing
+    
+    assert peak == 2
+    assert all(task.status == TaskStatus.COMPLETED for task in queue_manager.completed_tasks)
+
+@pytest.mark.asyncio
+async def test_shutdown_waits_for_running_handlers():
+    """Tasks dispatched before shutdown run to completion"""
+    queue_manager = TaskQueueManager()
+    
+    async def slow_handler(task):
+        await asyncio.sleep(0.05)
+        return {"done": task.id}
+    
+    queue_manager.register_handler("analysis", slow_handler)
+    await queue_manager.enqueue(_task("task-1"))
+    await queue_manager.enqueue(_task("task-2"))
+    await queue_manager._process_next_tasks()
+    
+    await queue_manager.shutdown()
+    
+    for task_id in ("task-1", "task-2"):
+        task = await queue_manager.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.results == {"done": task_id}
+    assert not queue_manager._inflight
+
+@pytest.mark.asyncio
+async def test_shutdown_survives_failing_handler():
+    """A handler error is recorded on the task and does not escape shutdown"""
+    queue_manager = TaskQueueManager()
+    
+    async def failing_handler(task):
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    queue_manager.register_handler("analysis", failing_handler)
+    await queue_manager.enqueue(_task("task-1"))
+    await queue_manager._process_next_tasks()
+    
+    await queue_manager.shutdown()
+    
+    task = await queue_manager.get_task("task-1")
+    assert task.status == TaskStatus.FAILED
+    assert "boom" in task.error
+
+@pytest.mark.asyncio
+async def test_shutdown_without_running_tasks():
+    await TaskQueueManager().shutdown()
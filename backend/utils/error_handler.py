@@ -1,5 +1,5 @@
 # backend/utils/error_handler.py
-import traceback
+import logging
 from typing import Dict, Any, Optional, List, Type
 from fastapi import HTTPException
 from utils.logger import setup_logger
@@ -23,15 +23,18 @@ class BaseAppError(Exception):
         self.error_code = error_code or "INTERNAL_ERROR"
         super().__init__(self.message)
         
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert the error to a dictionary for API responses"""
-        return {
+        # Invariant part of the response payload, built once
+        self._payload = {
             "error": self.error_code,
             "message": self.message,
-            "status_code": self.status_code,
-            "details": self.details
+            "status_code": self.status_code
         }
         
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the error to a dictionary for API responses"""
+        # A shallow copy per call, so callers can modify it without changing the error
+        return {**self._payload, "details": self.details}
+        
     def to_http_exception(self) -> HTTPException:
         """Convert to FastAPI HTTPException"""
         return HTTPException(
@@ -184,17 +187,21 @@ def log_exception(
         exception (Exception): The exception to log
         context (dict, optional): Additional context about when the error occurred
     """
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    
     error_details = {
         "error_type": type(exception).__name__,
-        "error_message": str(exception),
-        "traceback": traceback.format_exc()
+        "error_message": str(exception)
     }
     
     if context:
         error_details["context"] = context
-        
+    
+    # exc_info defers traceback formatting to the handlers that emit the record
     logger.error(
         f"Exception: {type(exception).__name__}: {str(exception)}",
+        exc_info=exception,
         extra={"error_details": error_details}
     )
 
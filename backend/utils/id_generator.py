@@ -0,0 +1,34 @@
+# backend/utils/id_generator.py
+import os
+import threading
+from collections import deque
+
+# Number of IDs generated from each urandom draw
+_BATCH_SIZE = 256
+_ID_BYTES = 16
+
+_id_pool = deque()
+_pool_lock = threading.Lock()
+
+def _refill_pool() -> None:
+    """Fill the pool from a single os.urandom call"""
+    random_bytes = os.urandom(_ID_BYTES * _BATCH_SIZE)
+    _id_pool.extend(
+        random_bytes[i:i + _ID_BYTES].hex()
+        for i in range(0, len(random_bytes), _ID_BYTES)
+    )
+
+def new_id() -> str:
+    """
+    Return a random 128-bit identifier as a 32-character hex string.
+
+    IDs are drawn from a pool refilled in batches, so most calls avoid both
+    the urandom syscall and the UUID object that str(uuid.uuid4()) creates.
+
+    Returns:
+        Unique identifier string
+    """
+    with _pool_lock:
+        if not _id_pool:
+            _refill_pool()
+        return _id_pool.popleft()
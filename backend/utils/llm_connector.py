@@ -1,8 +1,10 @@
 # backend/utils/llm_connector.py
+import asyncio
+import hashlib
 import logging
 import os
-from typing import Dict, Optional, Any
-import json
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -13,13 +15,15 @@ class LLMProvider:
     """
     
     @staticmethod
-    def create(provider: str = "openai", model_name: Optional[str] = None) -> 'BaseLLMProvider':
+    def create(provider: str = "openai", model_name: Optional[str] = None,
+               http_client: Optional[Any] = None) -> 'BaseLLMProvider':
         """
         Factory method to create an instance of the appropriate LLM provider.
         
         Args:
             provider: The LLM provider to use (openai, anthropic, or groq)
             model_name: Optional specific model to use
+            http_client: Optional shared httpx.AsyncClient for the provider SDK to reuse
             
         Returns:
             An instance of the appropriate LLM provider class
@@ -27,25 +31,142 @@ class LLMProvider:
         provider = provider.lower()
         
         if provider == "openai":
-            return OpenAIProvider(model_name=model_name or "gpt-4")
+            return OpenAIProvider(model_name=model_name or "gpt-4", http_client=http_client)
         elif provider == "anthropic":
-            return AnthropicProvider(model_name=model_name or "claude-3-opus-20240229")
+            return AnthropicProvider(model_name=model_name or "claude-3-opus-20240229", http_client=http_client)
         elif provider == "groq":
-            return GroqProvider(model_name=model_name or "llama3-70b-8192")
+            return GroqProvider(model_name=model_name or "llama3-70b-8192", http_client=http_client)
         else:
             logger.warning(f"Unknown provider {provider}, falling back to OpenAI")
-            return OpenAIProvider(model_name=model_name or "gpt-4")
+            return OpenAIProvider(model_name=model_name or "gpt-4", http_client=http_client)
 
 
 class BaseLLMProvider:
     """Base class for LLM providers"""
     
-    def __init__(self, model_name: str):
+    # Display name used in log messages
+    provider_name = "LLM"
+    
+    def __init__(self, model_name: str, cache_size: int = 4096, cache_ttl: int = 3600):
         self.model_name = model_name
+        # Responses keyed by a hash of model, temperature and prompt
+        self._response_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+    
+    @classmethod
+    def _shared_client(cls, api_key: Optional[str], http_client: Optional[Any],
+                       factory: Callable[..., Any]) -> Any:
+        """
+        Return the SDK client for this provider class, creating it on first use.
+        
+        Clients are cached per class on (api_key, http_client), so providers
+        created per request reuse one connection pool instead of each opening
+        their own.
+        
+        Args:
+            api_key: API key the client authenticates with
+            http_client: Optional shared httpx.AsyncClient passed to the SDK
+            factory: SDK client class, called as factory(api_key=..., http_client=...)
+            
+        Returns:
+            The cached SDK client
+        """
+        cache = cls.__dict__.get("_client_cache")
+        if cache is None:
+            cache = {}
+            cls._client_cache = cache
+        
+        key = (api_key, http_client)
+        client = cache.get(key)
+        if client is None:
+            client = factory(api_key=api_key, http_client=http_client)
+            cache[key] = client
+        return client
     
     async def generate(self, prompt: str, temperature: float = 0.7) -> str:
         """
-        Generate text based on the prompt.
+        Generate text based on the prompt, reusing the cached response for a
+        prompt seen recently with the same model and temperature.
+        
+        Args:
+            prompt: The input prompt
+            temperature: Controls randomness (0.0 to 1.0)
+            
+        Returns:
+            The generated text
+        """
+        key = self._cache_key(prompt, temperature)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            result = await self._generate_impl(prompt, temperature)
+        except Exception as e:
+            # Errors are returned to the caller but never cached
+            logger.error(f"Error generating text with {self.provider_name}: {str(e)}")
+            return f"Error generating response: {str(e)}"
+        
+        self._response_cache[key] = result
+        return result
+    
+    async def generate_stream(self, prompt: str, temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Generate text based on the prompt, yielding it in chunks as it arrives.
+        
+        Shares the response cache with generate(): a cached response is yielded
+        as a single chunk, and a completed stream is cached.
+        
+        Args:
+            prompt: The input prompt
+            temperature: Controls randomness (0.0 to 1.0)
+            
+        Yields:
+            Successive pieces of the generated text
+        """
+        key = self._cache_key(prompt, temperature)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            async for chunk in self._stream_impl(prompt, temperature):
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            # Errors are returned to the caller but never cached
+            logger.error(f"Error streaming text with {self.provider_name}: {str(e)}")
+            yield f"Error generating response: {str(e)}"
+            return
+        
+        self._response_cache[key] = "".join(chunks)
+    
+    def _cache_key(self, prompt: str, temperature: float) -> str:
+        """Hash the model, temperature and prompt into a response cache key"""
+        return hashlib.blake2b(
+            f"{self.model_name}|{round(temperature, 2)}|{prompt}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+    
+    async def _stream_impl(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """
+        Stream from the provider's API. Providers without streaming support
+        fall back to yielding the whole response at once.
+        
+        Args:
+            prompt: The input prompt
+            temperature: Controls randomness (0.0 to 1.0)
+            
+        Yields:
+            Successive pieces of the generated text
+        """
+        yield await self._generate_impl(prompt, temperature)
+    
+    async def _generate_impl(self, prompt: str, temperature: float) -> str:
+        """
+        Call the provider's API. Subclasses implement this instead of generate().
         
         Args:
             prompt: The input prompt
@@ -55,87 +176,139 @@ class BaseLLMProvider:
             The generated text
         """
         raise NotImplementedError("Subclasses must implement this method")
+    
+    async def generate_batch(self, prompts: List[str], temperature: float = 0.7,
+                             concurrency: int = 8) -> List[str]:
+        """
+        Generate text for several prompts concurrently.
+        
+        Args:
+            prompts: The input prompts
+            temperature: Controls randomness (0.0 to 1.0)
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            The generated texts, in the same order as the prompts
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate(prompt, temperature)
+        
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
 
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI API provider implementation"""
     
-    def __init__(self, model_name: str = "gpt-4"):
+    provider_name = "OpenAI"
+    
+    def __init__(self, model_name: str = "gpt-4", http_client: Optional[Any] = None):
         super().__init__(model_name)
         try:
             import openai
-            self.client = openai.AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+            self.client = self._shared_client(os.environ.get("OPENAI_API_KEY"), http_client, openai.AsyncOpenAI)
             logger.info(f"Initialized OpenAI provider with model {model_name}")
         except ImportError:
             logger.error("Failed to import OpenAI library. Please install with 'pip install openai'")
             raise
     
-    async def generate(self, prompt: str, temperature: float = 0.7) -> str:
+    async def _generate_impl(self, prompt: str, temperature: float) -> str:
         """Generate text using OpenAI API"""
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            logger.error(f"Error generating text with OpenAI: {str(e)}")
-            return f"Error generating response: {str(e)}"
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=2000
+        )
+        return response.choices[0].message.content
+    
+    async def _stream_impl(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """Stream text using OpenAI API"""
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=2000,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
 
 
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic Claude API provider implementation"""
     
-    def __init__(self, model_name: str = "claude-3-opus-20240229"):
+    provider_name = "Anthropic"
+    
+    def __init__(self, model_name: str = "claude-3-opus-20240229", http_client: Optional[Any] = None):
         super().__init__(model_name)
         try:
             import anthropic
-            self.client = anthropic.AsyncAnthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+            self.client = self._shared_client(os.environ.get("ANTHROPIC_API_KEY"), http_client, anthropic.AsyncAnthropic)
             logger.info(f"Initialized Anthropic provider with model {model_name}")
         except ImportError:
             logger.error("Failed to import Anthropic library. Please install with 'pip install anthropic'")
             raise
     
-    async def generate(self, prompt: str, temperature: float = 0.7) -> str:
+    async def _generate_impl(self, prompt: str, temperature: float) -> str:
         """Generate text using Anthropic Claude API"""
-        try:
-            response = await self.client.messages.create(
-                model=self.model_name,
-                max_tokens=2000,
-                temperature=temperature,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response.content[0].text
-        except Exception as e:
-            logger.error(f"Error generating text with Anthropic: {str(e)}")
-            return f"Error generating response: {str(e)}"
+        response = await self.client.messages.create(
+            model=self.model_name,
+            max_tokens=2000,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.content[0].text
+    
+    async def _stream_impl(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """Stream text using Anthropic Claude API"""
+        async with self.client.messages.stream(
+            model=self.model_name,
+            max_tokens=2000,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
 
 
 class GroqProvider(BaseLLMProvider):
     """Groq API provider implementation"""
     
-    def __init__(self, model_name: str = "llama3-70b-8192"):
+    provider_name = "Groq"
+    
+    def __init__(self, model_name: str = "llama3-70b-8192", http_client: Optional[Any] = None):
         super().__init__(model_name)
         try:
             import groq
-            self.client = groq.AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
+            self.client = self._shared_client(os.environ.get("GROQ_API_KEY"), http_client, groq.AsyncGroq)
             logger.info(f"Initialized Groq provider with model {model_name}")
         except ImportError:
             logger.error("Failed to import Groq library. Please install with 'pip install groq'")
             raise
     
-    async def generate(self, prompt: str, temperature: float = 0.7) -> str:
+    async def _generate_impl(self, prompt: str, temperature: float) -> str:
         """Generate text using Groq API"""
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            logger.error(f"Error generating text with Groq: {str(e)}")
-            return f"Error generating response: {str(e)}"
\ No newline at end of file
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=2000
+        )
+        return response.choices[0].message.content
+    
+    async def _stream_impl(self, prompt: str, temperature: float) -> AsyncIterator[str]:
+        """Stream text using Groq API"""
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=2000,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
@@ -1,9 +1,56 @@
 # backend/utils/logger.py
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Console and file handlers shared by every logger from setup_logger, created on first use
+_shared_handlers = None
+
+def _get_shared_handlers():
+    """Create the shared console and file handlers once per process"""
+    global _shared_handlers
+    if _shared_handlers is None:
+        formatter = logging.Formatter(LOG_FORMAT)
+        
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        
+        # File handler (optional)
+        log_dir = os.environ.get("LOG_DIR", "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, f"app_{datetime.now():%Y%m%d}.log")
+        
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(formatter)
+        
+        _shared_handlers = (console_handler, file_handler)
+    return _shared_handlers
+
+# Queue handler attached to every logger; a background listener does the formatting and I/O
+_queue_handler = None
+
+def _get_queue_handler():
+    """Create the queue handler and start its listener thread once per process"""
+    global _queue_handler
+    if _queue_handler is None:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, *_get_shared_handlers(), respect_handler_level=True
+        )
+        listener.start()
+        # Drain queued records before the interpreter exits
+        atexit.register(listener.stop)
+        
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+    return _queue_handler
+
 def setup_logger(name, log_level=None):
     """
     Set up a logger with the specified name and log level.
@@ -24,34 +71,12 @@ def setup_logger(name, log_level=None):
     logger = logging.getLogger(name)
     logger.setLevel(log_level)
     
-    # Create handlers if they don't exist
+    # Attach the shared queue handler; the logger's level does the filtering,
+    # so log calls only enqueue the record and never block on console or file writes
     if not logger.handlers:
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(log_level)
-        
-        # Create formatter
-        log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        formatter = logging.Formatter(log_format)
-        console_handler.setFormatter(formatter)
-        
-        # Add handlers to logger
-        logger.addHandler(console_handler)
-        
-        # File handler (optional)
-        log_dir = os.environ.get("LOG_DIR", "logs")
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
-        log_file = os.path.join(
-            log_dir, 
-            f"app_{datetime.now().strftime('%Y%m%d')}.log"
-        )
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(log_level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        logger.addHandler(_get_queue_handler())
+        # Already handled here, so skip dispatching to the root logger's handlers
+        logger.propagate = False
     
     return logger
 
@@ -64,7 +89,7 @@ def configure_root_logger():
     # Set more restrictive level for third-party libraries
     logging.basicConfig(
         level=logging.WARNING,  # Default level for other loggers
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        format=LOG_FORMAT
     )
     
     # Only set our application loggers to the specified level
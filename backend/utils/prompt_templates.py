@@ -1,20 +1,20 @@
 # backend/utils/prompt_templates.py
+from string import Formatter
 
-# Define structured templates for different LLM prompting tasks
+# Define structured templates for different LLM prompting tasks.
+#
+# Each template is split into a static prefix (role, task, output format and
+# guidelines) and a dynamic suffix holding every {placeholder}. Keeping all
+# variable text at the end means repeated calls share the longest possible
+# prompt prefix, which is what provider-side prompt caches match on.
 
-PROMPT_TEMPLATES = {
+STATIC_PREFIXES = {
     # Template for understanding user intent and extracting entities
     "understanding_agent": """
 You are an AI assistant specializing in understanding user requests about data analysis.
 Your task is to analyze the user's message, identify their intent, extract relevant entities,
 and determine if you need more information before proceeding with an analysis.
 
-User Message: {message}
-
-{conversation_history}
-
-{file_context}
-
 Please analyze the request and provide the following structured output:
 
 INTENT: [Identify the main intent - one of: general_query, data_analysis, visualization, summary, prediction, correlation, comparison, time_series, clarification, or others you determine]
@@ -33,16 +33,7 @@ Be thorough in identifying all relevant entities and determining if clarificatio
     # Template for generating natural language responses
     "response_generation": """
 You are an AI assistant specializing in data analysis conversations.
-Generate a helpful, friendly response to the user's query based on the following information:
-
-Intent Type: {intent}
-Relevant Entities: {entities}
-
-{conversation_history}
-
-{available_insights}
-
-{pending_tasks}
+Generate a helpful, friendly response to the user's query based on the information below.
 
 Guidelines for your response:
 1. Be conversational and personable, but professional
@@ -51,21 +42,12 @@ Guidelines for your response:
 4. If the user is asking a question you don't have data for, be honest about limitations
 5. Keep responses concise and focused on what the user cares about
 6. If data analysis is pending, set clear expectations about what will happen next
-
-Your response:
 """,
 
     # Template for creating analysis tasks
     "task_creation": """
 You are an AI assistant specializing in creating structured data analysis tasks.
-Based on the information below, create a well-defined analytical task:
-
-Intent Type: {intent}
-Relevant Entities: {entities}
-
-{conversation_context}
-
-{file_context}
+Based on the information below, create a well-defined analytical task.
 
 Please create a structured task definition with the following format:
 
@@ -93,35 +75,21 @@ Ensure that the task is specific enough to be executed by an automated system an
     # Template for follow-up question generation
     "followup_generation": """
 You are an AI assistant specializing in data analysis conversations.
-Based on the current conversation and available information, generate a thoughtful follow-up question
+Based on the current conversation and available information below, generate a thoughtful follow-up question
 to help guide the user toward more insightful data analysis.
 
-Current conversation context:
-{conversation_history}
-
-Available data information:
-{file_context}
-
-Current analysis status:
-{analysis_status}
-
 Generate a single follow-up question that:
 1. Builds on what the user has already asked
 2. Helps them discover additional insights
 3. Is specific to their data
 4. Demonstrates understanding of their analytical goals
 5. Is phrased naturally and conversationally
-
-Your follow-up question:
 """,
 
     # Template for data summary creation
     "data_summary": """
 You are an AI assistant specializing in describing datasets in clear, accessible language.
-Analyze the provided dataset metadata and create a concise summary.
-
-Dataset information:
-{file_metadata}
+Analyze the dataset metadata provided below and create a concise summary.
 
 Please create a summary with the following information:
 1. A brief overview of what the dataset contains
@@ -131,39 +99,25 @@ Please create a summary with the following information:
 5. Potential analysis opportunities
 
 Keep the summary concise, informative, and accessible to non-technical users.
-Your summary:
 """,
 
     # Template for context extraction from files
     "file_context_extraction": """
 You are an AI assistant specializing in extracting relevant context from data files.
-Based on the user's query and the available file metadata, identify which parts of the data
+Based on the user's query and the available file metadata below, identify which parts of the data
 are most relevant to address the user's needs.
 
-User query: {user_query}
-
-Available files:
-{available_files}
-
 For each relevant file, extract the following:
 1. Which columns are most relevant to the query
 2. What types of analysis would be most appropriate
 3. Any potential data quality issues to be aware of
 4. Specific sections or time periods of interest
-
-Your extracted context:
 """,
 
     # Template for insight generation
     "insight_generation": """
 You are an AI assistant specializing in converting data analysis results into clear, actionable insights.
-Transform the technical analysis results into natural language insights that a non-technical user can understand.
-
-Analysis results:
-{analysis_results}
-
-Original user query:
-{user_query}
+Transform the technical analysis results below into natural language insights that a non-technical user can understand.
 
 Please generate 3-5 key insights with the following structure:
 1. A clear, concise statement of the insight
@@ -172,26 +126,164 @@ Please generate 3-5 key insights with the following structure:
 4. Confidence level (high, medium, or low)
 
 Format these insights in natural language that would be easy for a business user to understand.
-Your insights:
 """,
 
     # Template for error handling and explanation
     "error_explanation": """
 You are an AI assistant specializing in explaining technical errors in accessible terms.
-Explain the error that occurred during data analysis in a way that's helpful and non-technical.
-
-Error details:
-{error_details}
-
-Original request:
-{original_request}
+Explain the error described below in a way that's helpful and non-technical.
 
 Please provide:
 1. A simple explanation of what went wrong
 2. The most likely cause
 3. Suggestions for how to proceed
 4. Avoid technical jargon unless necessary
+"""
+}
+
+DYNAMIC_SUFFIXES = {
+    "understanding_agent": """
+User Message: {message}
+
+{conversation_history}
+
+{file_context}
+""",
+
+    "response_generation": """
+Intent Type: {intent}
+Relevant Entities: {entities}
+
+{conversation_history}
+
+{available_insights}
+
+{pending_tasks}
+
+Your response:
+""",
+
+    "task_creation": """
+Intent Type: {intent}
+Relevant Entities: {entities}
+
+{conversation_context}
+
+{file_context}
+""",
+
+    "followup_generation": """
+Current conversation context:
+{conversation_history}
+
+Available data information:
+{file_context}
+
+Current analysis status:
+{analysis_status}
+
+Your follow-up question:
+""",
+
+    "data_summary": """
+Dataset information:
+{file_metadata}
+
+Your summary:
+""",
+
+    "file_context_extraction": """
+User query: {user_query}
+
+Available files:
+{available_files}
+
+Your extracted context:
+""",
+
+    "insight_generation": """
+Analysis results:
+{analysis_results}
+
+Original user query:
+{user_query}
+
+Your insights:
+""",
+
+    "error_explanation": """
+Error details:
+{error_details}
+
+Original request:
+{original_request}
 
 Your explanation:
 """
-}
\ No newline at end of file
+}
+
+# Full templates, for callers that format the whole string themselves
+PROMPT_TEMPLATES = {
+    name: STATIC_PREFIXES[name] + DYNAMIC_SUFFIXES[name]
+    for name in STATIC_PREFIXES
+}
+
+def _compile(template: str):
+    """Parse a format string once into (literal text, field name or None) segments"""
+    segments = []
+    for literal, field, format_spec, conversion in Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Prompt placeholders must be plain fields, got {{{field}}} with a spec")
+        segments.append((literal, field))
+    return tuple(segments)
+
+def _make_renderer(name: str):
+    """
+    Build the render function for one template.
+
+    The static prefix and the suffix segments, parsed once here, are bound
+    in the closure, so a call does no template lookup or format parsing.
+    """
+    prefix = STATIC_PREFIXES[name]
+    segments = _compile(DYNAMIC_SUFFIXES[name])
+
+    def render_template(**variables) -> str:
+        parts = [prefix]
+        for literal, field in segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(variables[field]))
+        return "".join(parts)
+
+    render_template.__name__ = f"render_{name}"
+    render_template.__doc__ = f"Render the {name} prompt from its placeholder values."
+    return render_template
+
+# One render function per template, built at import
+render_understanding_agent = _make_renderer("understanding_agent")
+render_response_generation = _make_renderer("response_generation")
+render_task_creation = _make_renderer("task_creation")
+render_followup_generation = _make_renderer("followup_generation")
+render_data_summary = _make_renderer("data_summary")
+render_file_context_extraction = _make_renderer("file_context_extraction")
+render_insight_generation = _make_renderer("insight_generation")
+render_error_explanation = _make_renderer("error_explanation")
+
+# Name -> render function, for render(); fails at import if a template lacks one above
+_RENDERERS = {name: globals()[f"render_{name}"] for name in STATIC_PREFIXES}
+
+def render(name: str, **variables) -> str:
+    """
+    Render a prompt template by name, filling only its dynamic suffix.
+
+    The static prefix is never substituted, so it stays byte-identical
+    across calls. Hot paths can call the render_<name> functions directly.
+
+    Args:
+        name: Key of the template in PROMPT_TEMPLATES
+        **variables: Values for the template's placeholders
+
+    Returns:
+        The complete prompt
+    """
+    return _RENDERERS[name](**variables)
@@ -1,15 +1,28 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-import json
+import orjson
 import time
 import uuid
+import gzip
+import hashlib
+from functools import lru_cache
 from datetime import datetime
 import os
 from io import StringIO
 
 # Configuration
 API_URL = "http://localhost:8000"  # Update this with your API URL
+RESPONSE_CACHE_TTL = 3600  # Seconds a cached chat response stays valid
+GZIP_UPLOAD_EXTENSIONS = ("csv", "txt", "json")  # Text formats compressed before upload
+JSON_HEADERS = {"Content-Type": "application/json"}  # Request bodies are encoded with orjson
+REQUEST_TIMEOUT = (3, 30)  # (connect, read) seconds for quick API calls
+LLM_REQUEST_TIMEOUT = (3, 300)  # Calls that wait on the LLM or on file analysis
+TASK_REFRESH_INTERVAL = 10  # Seconds between task status refreshes
+UNKNOWN_TASK_STATUS = "UNKNOWN"  # Shown for tasks the backend no longer knows (expired or lost on restart)
+FINISHED_TASK_STATUSES = ("COMPLETED", "FAILED", "CANCELLED", UNKNOWN_TASK_STATUS)  # Never change again, so not polled
 
 # Set page config
 st.set_page_config(
@@ -31,41 +44,134 @@ if "file_uploaded" not in st.session_state:
     st.session_state.file_uploaded = False
 if "file_info" not in st.session_state:
     st.session_state.file_info = None
+if "llm_cache" not in st.session_state:
+    # cache key -> (stored_at, response)
+    st.session_state.llm_cache = {}
+    st.session_state.llm_cache_hits = 0
+    st.session_state.llm_cache_misses = 0
+
+@st.cache_resource
+def get_http_session():
+    """
+    HTTP session shared by every rerun and browser session, so API calls reuse
+    pooled keep-alive connections; connection failures are retried with backoff
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.2)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http = get_http_session()
 
 # Helper functions
-def send_message(message):
-    """Send a message to the backend API"""
-    url = f"{API_URL}/api/conversation/message"
+@lru_cache(maxsize=256)
+def _cache_key(session_id, message, file_key, last_reply):
+    """Hash a message together with the session, uploaded file and reply it followed"""
+    payload = orjson.dumps({"session": session_id, "msg": message, "file": file_key, "after": last_reply},
+                           option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+def _current_file_key():
+    """Identify the uploaded file, so a new upload invalidates cached responses"""
+    file_info = st.session_state.file_info
+    if not file_info:
+        return None
+    metadata = file_info.get("metadata", {})
+    return metadata.get("content_hash") or metadata.get("file_id") or file_info.get("filename")
+
+def _last_reply():
+    """The latest assistant message, which context-dependent questions like "explain more" refer to"""
+    for message in reversed(st.session_state.messages):
+        if message["role"] == "assistant":
+            return message["content"]
+    return None
+
+def _get_cached_response(message):
+    """Return the cached response to a repeated question, or None, counting hits and misses"""
+    key = _cache_key(st.session_state.session_id, message, _current_file_key(), _last_reply())
+    cached = st.session_state.llm_cache.get(key)
+    if cached is not None and time.time() - cached[0] < RESPONSE_CACHE_TTL:
+        st.session_state.llm_cache_hits += 1
+        return cached[1]
+    st.session_state.llm_cache_misses += 1
+    return None
+
+def _cache_response(message, result):
+    """Cache a response unless it queued tasks"""
+    # Responses that queued tasks are not replayed, so a repeat creates its tasks again
+    if not result.get("tasks_created"):
+        key = _cache_key(st.session_state.session_id, message, _current_file_key(), _last_reply())
+        st.session_state.llm_cache[key] = (time.time(), result)
+
+def stream_message(message, meta):
+    """
+    Send a message to the streaming endpoint and yield the response text as it arrives.
+    The start event's fields (response type, created task IDs) are stored in meta.
+    """
+    url = f"{API_URL}/api/conversation/stream"
     data = {
         "session_id": st.session_state.session_id,
         "user_id" : st.session_state.user_id,
         "message": message,
     }
-    response = requests.post(url, json=data)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        st.error(f"Error sending message: {response.text}")
-        return None
+    with http.post(
+        url, data=orjson.dumps(data), headers=JSON_HEADERS, stream=True, timeout=LLM_REQUEST_TIMEOUT
+    ) as response:
+        if response.status_code != 200:
+            st.error(f"Error sending message: {response.text}")
+            return
+        
+        for line in response.iter_lines():
+            # Server-sent events: one "data: <json>" line per event
+            if not line.startswith(b"data: "):
+                continue
+            event = orjson.loads(line[6:])
+            if event["type"] == "start":
+                meta.update(event)
+            elif event["type"] == "token":
+                yield event["text"]
 
 def upload_file(file):
     """Upload a file to the backend API"""
     url = f"{API_URL}/api/data/upload"
-    files = {"file": file}
-    data = {"session_id": st.session_state.session_id}
-    response = requests.post(url, files=files, data=data)
+    content = file.getvalue()
+    if file.name.rsplit(".", 1)[-1].lower() in GZIP_UPLOAD_EXTENSIONS:
+        # Text data compresses well; the backend decompresses it while saving
+        files = {"file": (file.name, gzip.compress(content, compresslevel=6), "application/gzip")}
+    else:
+        files = {"file": file}
+    # The backend checks the stored content against this and shares analysis results by it
+    data = {
+        "session_id": st.session_state.session_id,
+        "content_hash": hashlib.sha256(content).hexdigest(),
+    }
+    response = http.post(url, files=files, data=data, timeout=LLM_REQUEST_TIMEOUT)
     if response.status_code == 200:
-        return response.json()
+        return orjson.loads(response.content)
     else:
         st.error(f"Error uploading file: {response.text}")
         return None
 
 def get_data_preview():
-    """Get a preview of the uploaded data"""
+    """Get a preview of the uploaded data, revalidating the last one with its ETag"""
     url = f"{API_URL}/api/data/preview/{st.session_state.session_id}"
-    response = requests.get(url)
+    cached = st.session_state.get("data_preview_cache")
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+    response = http.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304:
+        # Data unchanged on the server: reuse the copy we already decoded
+        return cached["data"]
     if response.status_code == 200:
-        return response.json()
+        data = orjson.loads(response.content)
+        etag = response.headers.get("ETag")
+        if etag:
+            st.session_state.data_preview_cache = {"etag": etag, "data": data}
+        return data
     else:
         st.error(f"Error getting data preview: {response.text}")
         return None
@@ -73,9 +179,9 @@ def get_data_preview():
 def get_data_info():
     """Get information about the uploaded data"""
     url = f"{API_URL}/api/data/info/{st.session_state.session_id}"
-    response = requests.get(url)
+    response = http.get(url, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
-        return response.json()
+        return orjson.loads(response.content)
     else:
         st.error(f"Error getting data info: {response.text}")
         return None
@@ -83,23 +189,46 @@ def get_data_info():
 def fetch_conversation_history():
     """Fetch conversation history from the backend API"""
     url = f"{API_URL}/api/conversation/history/{st.session_state.session_id}"
-    response = requests.get(url)
+    response = http.get(url, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
-        return response.json()["history"]
+        return orjson.loads(response.content)["history"]
     else:
         st.error(f"Error fetching conversation history: {response.text}")
         return []
 
 def fetch_tasks():
     """Fetch all tasks for the current session"""
-    # In a real application, we'd need an endpoint to fetch all tasks by session_id
-    # For now, we'll use our session state to track tasks
+    # We use our session state to track tasks; only unfinished ones are polled,
+    # all in a single batch request
+    pending_ids = [
+        task['task_id'] for task in st.session_state.tasks
+        if task['status'] not in FINISHED_TASK_STATUSES
+    ]
+    if not pending_ids:
+        return st.session_state.tasks
+    
+    try:
+        response = http.post(
+            f"{API_URL}/api/task/batch", data=orjson.dumps({"ids": pending_ids}), headers=JSON_HEADERS,
+            timeout=REQUEST_TIMEOUT
+        )
+    except requests.RequestException:
+        response = None
+    if response is None or response.status_code != 200:
+        # Keep showing the last known state rather than emptying the panel
+        st.warning("Could not refresh task status; showing the last known state.")
+        return st.session_state.tasks
+    
+    fetched = orjson.loads(response.content)["tasks"]
     updated_tasks = []
     for task in st.session_state.tasks:
-        url = f"{API_URL}/api/task/{task['task_id']}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            updated_tasks.append(response.json())
+        if task['status'] in FINISHED_TASK_STATUSES:
+            updated_tasks.append(task)
+        elif task['task_id'] in fetched:
+            updated_tasks.append(fetched[task['task_id']])
+        else:
+            # Reported as missing: keep the task visible and stop polling it
+            updated_tasks.append({**task, 'status': UNKNOWN_TASK_STATUS})
     return updated_tasks
 
 # UI Components
@@ -136,10 +265,16 @@ def display_file_upload():
                             "role": "system",
                             "content": f"File {uploaded_file.name} uploaded successfully. You can now ask questions about the data."
                         })
-                        # Get data preview
-                        preview = get_data_preview()
-                        if preview:
-                            st.session_state.data_preview = preview
+                        # Use the preview returned with the upload; fetch it only if missing
+                        if response.get("preview") is not None:
+                            st.session_state.data_preview = {
+                                "filename": response["file_info"]["filename"],
+                                "preview": response["preview"]
+                            }
+                        else:
+                            preview = get_data_preview()
+                            if preview:
+                                st.session_state.data_preview = preview
                         # Refresh the page to show the updated state
                         st.rerun()
 
@@ -162,39 +297,49 @@ def display_data_preview():
                 st.subheader("Data Information")
                 st.json(st.session_state.file_info["metadata"])
 
+@st.fragment(run_every=TASK_REFRESH_INTERVAL)
+def task_queue_fragment():
+    """Task list that refreshes on its own timer without rerunning the whole page"""
+    st.subheader("Task Queue")
+    
+    # Fetch latest task status
+    updated_tasks = fetch_tasks()
+    if updated_tasks:
+        st.session_state.tasks = updated_tasks
+    
+    if not st.session_state.tasks:
+        st.info("No tasks in queue")
+    else:
+        st.caption("Auto-refreshing task status...")
+        for task in st.session_state.tasks:
+            with st.expander(f"{task['description']} ({task['status']})", expanded=True):
+                st.write(f"ID: {task['task_id'][:8]}...")
+                st.write(f"Status: {task['status']}")
+                st.write(f"Created: {task['created_at']}")
+                st.write(f"Updated: {task['updated_at']}")
+                
+                if task['status'] == "COMPLETED" and task['results']:
+                    st.success("Task completed")
+                    st.write("Results:")
+                    st.json(task['results'])
+                elif task['status'] == "FAILED":
+                    st.error("Task failed")
+                elif task['status'] == UNKNOWN_TASK_STATUS:
+                    st.warning("Task is unknown to the server; it may have expired")
+                elif task['status'] == "RUNNING":
+                    st.info("Task is running...")
+                else:
+                    st.warning("Task is queued")
+
 def display_task_queue():
     """Display the task queue"""
+    # Fragments cannot open the sidebar themselves, so render this one inside it
     with st.sidebar:
-        st.subheader("Task Queue")
-        
-        # Fetch latest task status
-        updated_tasks = fetch_tasks()
-        if updated_tasks:
-            st.session_state.tasks = updated_tasks
-        
-        if not st.session_state.tasks:
-            st.info("No tasks in queue")
-        else:
-            for task in st.session_state.tasks:
-                with st.expander(f"{task['description']} ({task['status']})", expanded=True):
-                    st.write(f"ID: {task['task_id'][:8]}...")
-                    st.write(f"Status: {task['status']}")
-                    st.write(f"Created: {task['created_at']}")
-                    st.write(f"Updated: {task['updated_at']}")
-                    
-                    if task['status'] == "COMPLETED" and task['results']:
-                        st.success("Task completed")
-                        st.write("Results:")
-                        st.json(task['results'])
-                    elif task['status'] == "FAILED":
-                        st.error("Task failed")
-                    elif task['status'] == "RUNNING":
-                        st.info("Task is running...")
-                    else:
-                        st.warning("Task is queued")
+        task_queue_fragment()
 
+@st.fragment
 def display_chat():
-    """Display the chat interface"""
+    """Display the chat interface; sending a message reruns only this fragment"""
     st.subheader("Chat with Data Analyst Agent")
     
     # Display chat messages
@@ -214,35 +359,44 @@ def display_chat():
         with st.chat_message("user"):
             st.write(user_input)
         
-        # Get response from API
-        with st.spinner("Thinking..."):
-            response = send_message(user_input)
+        # Get response from API, rendering it as it streams in
+        response = _get_cached_response(user_input)
+        with st.chat_message("assistant"):
             if response:
-                # Add assistant message to chat
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": response["response"]
-                })
-                
-                # Display assistant message
-                with st.chat_message("assistant"):
-                    st.write(response["response"])
-                
-                # Update task list if new tasks were created
-                if "tasks_created" in response and response["tasks_created"]:
-                    for task_id in response["tasks_created"]:
-                        url = f"{API_URL}/api/task/{task_id}"
-                        task_response = requests.get(url)
-                        if task_response.status_code == 200:
-                            st.session_state.tasks.append(task_response.json())
-                
-                # Force a refresh
-                #st.experimental_rerun()
+                st.write(response["response"])
+            else:
+                meta = {}
+                text = st.write_stream(stream_message(user_input, meta))
+                if meta:
+                    response = {"response": text, "tasks_created": meta.get("pending_tasks", [])}
+                    _cache_response(user_input, response)
+        
+        if response:
+            # Add assistant message to chat
+            st.session_state.messages.append({
+                "role": "assistant", 
+                "content": response["response"]
+            })
+            
+            # Update task list if new tasks were created
+            if "tasks_created" in response and response["tasks_created"]:
+                for task_id in response["tasks_created"]:
+                    url = f"{API_URL}/api/task/{task_id}"
+                    task_response = http.get(url, timeout=REQUEST_TIMEOUT)
+                    if task_response.status_code == 200:
+                        st.session_state.tasks.append(orjson.loads(task_response.content))
+            
+            # Force a refresh
+            #st.experimental_rerun()
 
 def main():
     # Set up the sidebar
     st.sidebar.title("Data Analyst Agent")
     st.sidebar.info("Upload a file and chat with the agent to analyze your data.")
+    st.sidebar.caption(
+        f"Response cache: {st.session_state.llm_cache_hits} hits, "
+        f"{st.session_state.llm_cache_misses} misses"
+    )
     
     # Display task queue in sidebar
     display_task_queue()
@@ -256,12 +410,6 @@ def main():
     
     # Display chat interface
     display_chat()
-    
-    # Auto-refresh task status every 10 seconds
-    if st.session_state.tasks:
-        st.sidebar.write("Auto-refreshing task status...")
-        time.sleep(10)
-        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file